@@ -1,118 +1,1265 @@
 #!/usr/bin/env python3
 """
 CRC32 爆破工具 - 用于反向推导已知 CRC32 值的原始数据
-支持自定义字符集、长度和多项式参数
+支持自定义字符集、长度和多项式参数, 以及 CRC-32C、CRC-32/BZIP2、CRC-16、CRC-64 等变种
 """
 import binascii
 import argparse
+import heapq
+import itertools
+import json
+import mmap
+import os
+import struct
 import sys
+import time
+import zipfile
+import platform
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+try:
+    import numpy as np  # 可选, 用于批量计算
+except ImportError:
+    np = None
+
+try:
+    import resource  # 仅 Unix, 用于 bench 统计内存峰值
+except ImportError:
+    resource = None
+
+# 中间相遇正向表的最大条目数, 超过后 auto 模式不再选择中间相遇
+MITM_TABLE_LIMIT = 1 << 24
+# 批量计算时每块候选的数量
+BATCH_SIZE = 1 << 20
+# numpy 分块计算大文件 CRC 时每行的字节数 (8 的倍数)
+SLICE_BLOCK = 1 << 12
+# 内存映射文件时每次处理的字节数 (SLICE_BLOCK 的倍数)
+FILE_CHUNK = 1 << 26
+
+# 常用 CRC 参数: 反射算法的多项式使用反转后的表示, init 与 xorout 相同 (默认全 1)
+CRC_MODELS = {
+    'crc32': {'width': 32, 'poly': 0xEDB88320, 'reflect': True},
+    'crc32c': {'width': 32, 'poly': 0x82F63B78, 'reflect': True},
+    'crc32-bzip2': {'width': 32, 'poly': 0x04C11DB7, 'reflect': False},
+    'crc16': {'width': 16, 'poly': 0xA001, 'reflect': True, 'xorout': 0},  # CRC-16/ARC
+    'crc64': {'width': 64, 'poly': 0xC96C5795D7870F42, 'reflect': True},  # CRC-64/XZ
+}
+
+# 查找表的磁盘缓存目录
+TABLE_CACHE_DIR = os.path.join(os.path.expanduser('~'), '.cache', 'ctfcode', 'crc_tables')
+# 进程内的查找表缓存, 所有实例共享
+TABLE_CACHE = {}
+
+# 英文中最常见的 50 个字母二元组的频率 (%), 用于给结果的可读性打分
+ENGLISH_BIGRAMS = {
+    'th': 3.56, 'he': 3.07, 'in': 2.43, 'er': 2.05, 'an': 1.99, 're': 1.85, 'on': 1.76,
+    'at': 1.49, 'en': 1.45, 'nd': 1.35, 'ti': 1.34, 'es': 1.34, 'or': 1.28, 'te': 1.20,
+    'of': 1.17, 'ed': 1.17, 'is': 1.13, 'it': 1.12, 'al': 1.09, 'ar': 1.07, 'st': 1.05,
+    'to': 1.04, 'nt': 1.04, 'ng': 0.95, 've': 0.83, 'ha': 0.83, 'as': 0.87, 'ou': 0.87,
+    'io': 0.83, 'le': 0.83, 'se': 0.83, 'co': 0.79, 'me': 0.79, 'de': 0.76, 'hi': 0.76,
+    'ri': 0.73, 'ro': 0.73, 'ic': 0.70, 'ne': 0.69, 'ea': 0.69, 'ra': 0.69, 'ce': 0.65,
+    'li': 0.62, 'ch': 0.60, 'll': 0.58, 'be': 0.58, 'ma': 0.57, 'si': 0.55, 'om': 0.55,
+    'ur': 0.54,
+}
+
+# 以这些 flag 格式开头 (数据更短时为其前缀, 至少 3 个字符) 的结果额外加分
+FLAG_PREFIXES = ('flag{', 'ctf')
+FLAG_BONUS = 1.0
+
+PRINTABLE_BYTES = frozenset(range(0x20, 0x7F)) | {0x09, 0x0A, 0x0D}
+
+def reflect_bits(value, width):
+    """按位反转 (常规多项式表示 <-> 反射表示)"""
+    return int(format(value, f'0{width}b')[::-1], 2)
+
+def build_tables(poly, width=32, reflect=True):
+    """构建 CRC 查找表及反向查找表
+
+    反向表按查表结果中不受移位影响的那个字节 (反射算法为最高字节, 否则为最低字节) 索引
+    """
+    mask = (1 << width) - 1
+    top = width - 8
+    table = []
+    for i in range(256):
+        if reflect:
+            for j in range(8):
+                if i & 1:
+                    i >>= 1
+                    i ^= poly
+                else:
+                    i >>= 1
+        else:
+            i <<= top
+            for j in range(8):
+                if i >> (width - 1):
+                    i = ((i << 1) ^ poly) & mask
+                else:
+                    i = (i << 1) & mask
+        table.append(i)
+
+    buckets = [[] for _ in range(256)]
+    for j, value in enumerate(table):
+        buckets[value >> top if reflect else value & 0xFF].append(j)
+    return table, [tuple(found) for found in buckets]
+
+def get_tables(poly, width=32, reflect=True):
+    """获取查找表: 先查进程内缓存, 再查磁盘缓存, 都没有才重新构建并写回磁盘"""
+    key = (poly, width, reflect)
+    if key in TABLE_CACHE:
+        return TABLE_CACHE[key]
+
+    path = os.path.join(TABLE_CACHE_DIR, f"crc{width}_{poly:x}_{'ref' if reflect else 'norm'}.json")
+    tables = None
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            saved = json.load(f)
+        if len(saved['table']) == 256 and len(saved['reverse']) == 256:
+            tables = saved['table'], [tuple(found) for found in saved['reverse']]
+    except (OSError, ValueError, KeyError, TypeError):
+        pass
+
+    if tables is None:
+        tables = build_tables(poly, width, reflect)
+        try:
+            os.makedirs(TABLE_CACHE_DIR, exist_ok=True)
+            tmp_path = f"{path}.{os.getpid()}.tmp"
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump({'table': tables[0], 'reverse': tables[1]}, f)
+            os.replace(tmp_path, path)
+        except OSError:
+            pass  # 缓存目录不可写时只用内存缓存
+
+    TABLE_CACHE[key] = tables
+    return tables
+
+class CRCState:
+    """可回退的 CRC 寄存器栈
+
+    沿搜索树向下 push 一个字节只需一次查表, 回溯时 pop 直接恢复上一层的寄存器值,
+    共享前缀的部分不会重复计算
+    """
+    def __init__(self, crc, accum=0):
+        self.step = crc.step
+        self.xorout = crc.xorout
+        self.regs = [crc.start(accum)]
+        self.data = bytearray()
+
+    def __len__(self):
+        return len(self.data)
+
+    @property
+    def reg(self):
+        """当前寄存器值 (未异或 xorout)"""
+        return self.regs[-1]
+
+    @property
+    def crc(self):
+        """当前数据的 CRC 值"""
+        return self.regs[-1] ^ self.xorout
+
+    def peek(self, b):
+        """再处理一个字节后的寄存器值, 不入栈"""
+        return self.step(self.regs[-1], b)
+
+    def push(self, b):
+        """处理一个字节并入栈, 返回新的寄存器值"""
+        reg = self.peek(b)
+        self.regs.append(reg)
+        self.data.append(b)
+        return reg
+
+    def pop(self):
+        """回退最后一个字节并返回它"""
+        self.regs.pop()
+        return self.data.pop()
 
 class CRC32Reverse:
-    def __init__(self, crc32, length, tbl=bytes(range(256)), poly=0xEDB88320, accum=0):
+    def __init__(self, crc32, length, tbl=bytes(range(256)), poly=0xEDB88320, accum=0,
+                 width=32, reflect=True, xorout=None):
+        if width % 8 or width < 8:
+            raise ValueError(f"不支持的 CRC 位宽: {width}")
         self.char_set = set(tbl)  # 支持所有字节
         self.crc32 = crc32
         self.length = length
         self.poly = poly
         self.accum = accum
+        self.width = width
+        self.reflect = reflect
+        self.mask = (1 << width) - 1
+        self.xorout = self.mask if xorout is None else xorout
+        self.top = width - 8
+        self.nbytes = width // 8  # 末尾可直接反推的字节数
         self.table = []
         self.table_reverse = []
 
     def init_tables(self, poly, reverse=True):
-        """构建 CRC32 表及其反向查找表"""
-        # CRC32 表构建
-        for i in range(256):
-            for j in range(8):
-                if i & 1:
-                    i >>= 1
-                    i ^= poly
-                else:
-                    i >>= 1
-            self.table.append(i)
+        """获取 CRC 表及其反向查找表 (按多项式、位宽、是否反射缓存)"""
+        self.table, self.table_reverse = get_tables(poly, self.width, self.reflect)
 
-        assert len(self.table) == 256, "CRC32 表的大小错误"
+    def start(self, accum=0):
+        """从已有 CRC 值 accum 继续计算时的初始寄存器值"""
+        return (accum ^ self.xorout) & self.mask
 
-        # 构建反向查找表
-        if reverse:
-            for i in range(256):
-                found = [j for j in range(256) if self.table[j] >> 24 == i]
-                self.table_reverse.append(tuple(found))
-            
-            assert len(self.table_reverse) == 256, "反向查找表的大小错误"
+    def step(self, reg, b):
+        """处理一个字节后的寄存器值"""
+        if self.reflect:
+            return self.table[(reg ^ b) & 0xFF] ^ (reg >> 8)
+        return self.table[((reg >> self.top) ^ b) & 0xFF] ^ ((reg << 8) & self.mask)
 
     def calc(self, data, accum=0):
-        """计算 CRC32 校验值"""
-        accum = ~accum
+        """计算 CRC 校验值"""
+        if len(self.table) != 256:
+            self.init_tables(self.poly)
+        reg = self.start(accum)
         for b in data:
-            accum = self.table[(accum ^ b) & 0xFF] ^ ((accum >> 8) & 0x00FFFFFF)
-        accum = ~accum
-        return accum & 0xFFFFFFFF
+            reg = self.step(reg, b)
+        return reg ^ self.xorout
+
+    def calc_batch(self, candidates, accum=0):
+        """批量计算 CRC: (N, L) 的 uint8 候选数组 -> (N,) 的无符号整数数组"""
+        if np is None:
+            raise ImportError("批量计算需要 numpy (pip install numpy)")
+        if len(self.table) != 256:
+            self.init_tables(self.poly)
+        dtype = np.dtype(f'uint{self.width}') if self.width in (8, 16, 32, 64) else None
+        if dtype is None:
+            raise ValueError(f"批量计算不支持 {self.width} 位 CRC")
+        table = np.array(self.table, dtype=dtype)
+        low = dtype.type(0xFF)
+        candidates = np.asarray(candidates, dtype=np.uint8)
+        reg = np.full(candidates.shape[0], self.start(accum), dtype=dtype)
+        # 按列查表, 每列一次向量化的寄存器更新
+        for column in candidates.T:
+            column = column.astype(dtype)
+            if self.reflect:
+                reg = table[(reg ^ column) & low] ^ (reg >> dtype.type(8))
+            else:
+                reg = table[((reg >> dtype.type(self.top)) ^ column) & low] ^ (reg << dtype.type(8))
+        return reg ^ dtype.type(self.xorout)
+
+    def slice_tables(self):
+        """slicing-by-8 查找表: tables[k][i] 为字节 i 之后再处理 k 个零字节的寄存器值"""
+        if len(self.table) != 256:
+            self.init_tables(self.poly)
+        key = (self.poly, self.width, self.reflect, 'slice8')
+        if key not in TABLE_CACHE:
+            tables = [list(self.table)]
+            for _ in range(7):
+                tables.append([self.step(reg, 0) for reg in tables[-1]])
+            TABLE_CACHE[key] = tables
+        return TABLE_CACHE[key]
+
+    def zeros_tables(self, count):
+        """处理 count 个零字节这一线性变换的查表形式: 按寄存器的每个字节各一张表
+
+        先求一个零字节对各个位的作用, 再按二进制倍增组合, 避免真的逐字节计算 count 次
+        """
+        def apply(cols, reg):
+            out = 0
+            while reg:
+                low = reg & -reg
+                out ^= cols[low.bit_length() - 1]
+                reg ^= low
+            return out
+
+        power = [self.step(1 << b, 0) for b in range(self.width)]
+        result = [1 << b for b in range(self.width)]
+        while count:
+            if count & 1:
+                result = [apply(power, col) for col in result]
+            power = [apply(power, col) for col in power]
+            count >>= 1
+        return [[apply(result, i << (8 * k)) for i in range(256)] for k in range(self.nbytes)]
+
+    def calc_sliced(self, data, accum=0):
+        """slicing-by-8 计算 CRC: 每次处理 8 字节 (位宽不超过 64)"""
+        if self.width > 64:
+            return self.calc(data, accum)
+        t0, t1, t2, t3, t4, t5, t6, t7 = self.slice_tables()
+        reg = self.start(accum)
+        view = memoryview(data).cast('B')
+        body = len(view) - len(view) % 8
+        if self.reflect:
+            for (v,) in struct.iter_unpack('<Q', view[:body]):
+                v ^= reg
+                reg = (t7[v & 0xFF] ^ t6[(v >> 8) & 0xFF] ^ t5[(v >> 16) & 0xFF] ^ t4[(v >> 24) & 0xFF] ^
+                       t3[(v >> 32) & 0xFF] ^ t2[(v >> 40) & 0xFF] ^ t1[(v >> 48) & 0xFF] ^ t0[v >> 56])
+        else:
+            shift = 64 - self.width
+            for (v,) in struct.iter_unpack('>Q', view[:body]):
+                v ^= reg << shift
+                reg = (t7[v >> 56] ^ t6[(v >> 48) & 0xFF] ^ t5[(v >> 40) & 0xFF] ^ t4[(v >> 32) & 0xFF] ^
+                       t3[(v >> 24) & 0xFF] ^ t2[(v >> 16) & 0xFF] ^ t1[(v >> 8) & 0xFF] ^ t0[v & 0xFF])
+        for b in view[body:]:
+            reg = self.step(reg, b)
+        return reg ^ self.xorout
+
+    def calc_blocks(self, data, accum=0, block_size=SLICE_BLOCK):
+        """numpy 分块计算大数据的 CRC
+
+        把数据切成 N 行 block_size 字节, 所有行同时按 slicing-by-8 推进 (每行从零寄存器开始),
+        再利用线性性把各行结果依次合并: reg = Z(reg) ^ 行结果, Z 为处理 block_size 个零字节
+        """
+        if np is None or self.width > 64:
+            return self.calc_sliced(data, accum)
+        view = memoryview(data).cast('B')
+        rows = len(view) // block_size
+        if rows < 2:
+            return self.calc_sliced(view, accum)
+
+        # 第 k 个字节之后还要处理 7-k 个字节, 对应 tables[7-k]
+        tables = [np.array(t, dtype=np.uint64) for t in reversed(self.slice_tables())]
+        order = '<u8' if self.reflect else '>u8'
+        words = np.frombuffer(view, dtype=order, count=rows * block_size // 8).reshape(rows, block_size // 8)
+        # 转置成按列连续存放, 逐列读取时不再跨行跳跃访问内存
+        columns = np.ascontiguousarray(words.T)
+        regs = np.zeros(rows, dtype=np.uint64)
+        shift = np.uint64(64 - self.width)
+        for column in columns:
+            v = regs ^ column if self.reflect else (regs << shift) ^ column
+            # 按数据中的字节顺序拆开, 直接用 uint8 作为下标, 省去移位和掩码
+            data_bytes = v.astype(order, copy=False).view(np.uint8).reshape(rows, 8)
+            regs = np.take(tables[0], data_bytes[:, 0])
+            for k in range(1, 8):
+                regs ^= np.take(tables[k], data_bytes[:, k])
+        del words, columns, v, data_bytes
+
+        zeros = self.zeros_tables(block_size)
+        reg = self.start(accum)
+        for row in regs.tolist():
+            shifted = 0
+            for k, table in enumerate(zeros):
+                shifted ^= table[(reg >> (8 * k)) & 0xFF]
+            reg = shifted ^ row
+        # 剩余不足一行的部分
+        return self.calc_sliced(view[rows * block_size:], reg ^ self.xorout)
+
+    def calc_file(self, path, accum=0, chunk_size=FILE_CHUNK):
+        """通过内存映射分段计算文件的 CRC, 不把整个文件读入内存"""
+        accum_crc = accum
+        with open(path, 'rb') as f:
+            if os.fstat(f.fileno()).st_size == 0:
+                return self.calc(b'', accum)
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                with memoryview(mm) as view:
+                    for offset in range(0, len(view), chunk_size):
+                        with view[offset:offset + chunk_size] as chunk:
+                            accum_crc = self.calc_blocks(chunk, accum_crc)
+        return accum_crc
+
+    def candidate_blocks(self, length, block_size=BATCH_SIZE):
+        """按块生成字符集上所有长度为 length 的候选, 每块为 (n, length) 的 uint8 数组"""
+        char_set = np.array(sorted(self.char_set), dtype=np.uint8)
+        base = len(char_set)
+        total = base ** length
+        for start in range(0, total, block_size):
+            index = np.arange(start, min(start + block_size, total), dtype=np.int64)
+            digits = np.empty((len(index), length), dtype=np.uint8)
+            # 混合进制分解: 最后一列变化最快
+            for col in range(length - 1, -1, -1):
+                index, digit = np.divmod(index, base)
+                digits[:, col] = char_set[digit]
+            yield digits
+
+    def verify(self, results, accum=0, desired=None):
+        """校验结果列表, 只保留 CRC 与目标一致的候选 (默认目标为 self.crc32)"""
+        if desired is None:
+            desired = self.crc32
+        if not results:
+            return results
+        if np is not None and len({len(item) for item in results}) == 1:
+            candidates = np.frombuffer(b''.join(results), dtype=np.uint8).reshape(len(results), -1)
+            ok = self.calc_batch(candidates, accum) == desired
+            return [item for item, good in zip(results, ok.tolist()) if good]
+        return [item for item in results if self.calc(item, accum) == desired]
 
     def find_reverse(self, desired, accum):
-        """查找反向字节序列"""
+        """查找末尾 width/8 个字节, 使从 accum 继续计算的 CRC 等于 desired"""
         solutions = set()
-        accum = ~accum
-        stack = [(~desired,)]
-        
+        start = self.start(accum)
+        stack = [(self.start(desired), ())]
+
         while stack:
-            node = stack.pop()
-            for j in self.table_reverse[(node[0] >> 24) & 0xFF]:
-                if len(node) == 4:
-                    a = accum
-                    data = []
-                    node = node[1:] + (j,)
-                    for i in range(3, -1, -1):
-                        data.append((a ^ node[i]) & 0xFF)
-                        a >>= 8
-                        a ^= self.table[node[i]]
-                    solutions.add(tuple(data))
-                else:
-                    stack.append(((node[0] ^ self.table[j]) << 8,) + node[1:] + (j,))
-        
+            reg, node = stack.pop()
+            if len(node) == self.nbytes:
+                # 每一步的查表下标已知 (倒序), 从起始寄存器正向推出对应的字节
+                a = start
+                data = []
+                for j in reversed(node):
+                    if self.reflect:
+                        data.append((a ^ j) & 0xFF)
+                        a = self.table[j] ^ (a >> 8)
+                    else:
+                        data.append(((a >> self.top) ^ j) & 0xFF)
+                        a = self.table[j] ^ ((a << 8) & self.mask)
+                solutions.add(tuple(data))
+            elif self.reflect:
+                for j in self.table_reverse[reg >> self.top]:
+                    stack.append((((reg ^ self.table[j]) << 8) & self.mask, node + (j,)))
+            else:
+                for j in self.table_reverse[reg & 0xFF]:
+                    stack.append(((reg ^ self.table[j]) >> 8, node + (j,)))
+
         return solutions
 
-    def dfs(self, length, outlist=[b'']):
-        """深度优先搜索生成字节序列"""
+    def walk(self, length, accum=0):
+        """惰性枚举字符集上所有长度为 length 的前缀, 产出 (前缀, 处理前缀后的寄存器值)
+
+        里程表式枚举: 前 length-1 字节保存在 CRCState 中, 进位时只回退并重新处理
+        变化的字节; 末字节在内层循环中变化, 每个候选只需一次查表, 内存占用恒定
+        """
+        if len(self.table) != 256:
+            self.init_tables(self.poly)
+        table = self.table
+        top = self.top
+        mask = self.mask
+        char_set = sorted(self.char_set)
+        state = CRCState(self, accum)
         if length == 0:
-            return outlist
-        tmp_list = [item + bytes([x]) for item in outlist for x in self.char_set]
-        return self.dfs(length - 1, tmp_list)
+            yield b'', state.reg
+            return
+        if not char_set:
+            return
+
+        base = len(char_set)
+        head = length - 1
+        digits = [0] * head
+        for _ in range(head):
+            state.push(char_set[0])
+        while True:
+            reg = state.reg
+            prefix = bytes(state.data)
+            if self.reflect:
+                for x in char_set:
+                    yield prefix + bytes((x,)), table[(reg ^ x) & 0xFF] ^ (reg >> 8)
+            else:
+                for x in char_set:
+                    yield prefix + bytes((x,)), table[((reg >> top) ^ x) & 0xFF] ^ ((reg << 8) & mask)
+
+            # 里程表进位: 回退到发生变化的位置, 再逐字节 push
+            pos = head - 1
+            while pos >= 0:
+                state.pop()
+                digits[pos] += 1
+                if digits[pos] < base:
+                    break
+                digits[pos] = 0
+                pos -= 1
+            if pos < 0:
+                return
+            for i in range(pos, head):
+                state.push(char_set[digits[i]])
+
+    def dfs(self, length):
+        """惰性生成字符集上所有长度为 length 的字节序列"""
+        for prefix, _ in self.walk(length):
+            yield prefix
+
+    def step_back(self, reg, b):
+        """由处理字节 b 之后的寄存器值反推处理之前的寄存器值"""
+        if self.reflect:
+            for j in self.table_reverse[reg >> self.top]:
+                yield (((reg ^ self.table[j]) << 8) & self.mask) | (j ^ b)
+        else:
+            for j in self.table_reverse[reg & 0xFF]:
+                yield ((reg ^ self.table[j]) >> 8) | ((j ^ b) << self.top)
+
+    def mitm_cost(self):
+        """估算两种搜索方式的枚举量: (末尾 width/8 字节反推, 中间相遇)
+
+        比 width/8 字节短时反推方式直接枚举全部 n**length 个候选
+        """
+        n = len(self.char_set)
+        head = self.length // 2
+        reverse_cost = n ** (self.length - self.nbytes) if self.length >= self.nbytes else n ** self.length
+        return reverse_cost, n ** head + n ** (self.length - head)
+
+    def free_bits(self):
+        """字符集中会变化的位 (其余位对所有字符都相同, 视为常量), 返回 (变化的位列表, 常量值)"""
+        ones, zeros = 0xFF, 0xFF
+        for c in self.char_set:
+            ones &= c
+            zeros &= ~c & 0xFF
+        return [b for b in range(8) if not ((ones | zeros) >> b) & 1], ones
+
+    def linear_cost(self):
+        """估算线性求解的枚举量: 约 width 个主元落在末尾的字节上, 之前的字节逐个枚举"""
+        bits, _ = self.free_bits()
+        if not bits:
+            return 1
+        return len(self.char_set) ** max(self.length - -(-self.width // len(bits)), 0)
+
+    def iter_linear(self, targets):
+        """GF(2) 线性求解: 只把字符集中会变化的位当作变量, CRC 是这些变量的仿射函数
+
+        消元时总选行内序号最大的变量作主元, 于是每个主元只依赖更靠前的自由变量;
+        按字节从前往后深度优先枚举, 每个字节的位一确定就检查是否属于字符集.
+        逐个产出 (crc, 结果), 适合 [0-9]、十六进制这类只占少数几个位的字符集
+        """
+        if len(self.table) != 256:
+            self.init_tables(self.poly)
+        char_set = sorted(self.char_set)
+        if not char_set:
+            return
 
-    def run_reverse(self):
-        """执行 CRC32 反向查找"""
+        length = self.length
+        bits, fixed = self.free_bits()
+        f = len(bits)
+
+        # 所有变量取 0 时的 CRC, 以及每个变量翻转后 CRC 的变化量 (列向量)
+        buf = bytearray([fixed]) * length
+        base = self.calc(buf, self.accum)
+        cols = []
+        for k in range(length):
+            for b in bits:
+                buf[k] ^= 1 << b
+                cols.append(self.calc(buf, self.accum) ^ base)
+                buf[k] ^= 1 << b
+
+        # 每个 CRC 位一个方程; combo 记录由哪些原始方程组合而来, 不同目标只影响右端
+        pivots = {}  # 主元变量序号 -> (行, combo)
+        checks = []  # 消成 0 的行, 右端也必须为 0 才有解
+        for j in range(self.width):
+            row = 0
+            for v, col in enumerate(cols):
+                if (col >> j) & 1:
+                    row |= 1 << v
+            combo = 1 << j
+            for p, (prow, pcombo) in pivots.items():
+                if (row >> p) & 1:
+                    row ^= prow
+                    combo ^= pcombo
+            if not row:
+                checks.append(combo)
+                continue
+            p = row.bit_length() - 1
+            for q, (qrow, qcombo) in pivots.items():
+                if (qrow >> p) & 1:
+                    pivots[q] = (qrow ^ row, qcombo ^ combo)
+            pivots[p] = (row, combo)
+
+        # 预处理每个字节: 字符 c 的变量位、本字节自由位对主元的贡献与 c 自身主元位之差作为分桶键
+        spread = [[0] * 256 for _ in range(length)]
+        for k in range(length):
+            for c in char_set:
+                value = 0
+                for j, b in enumerate(bits):
+                    if (c >> b) & 1:
+                        value |= 1 << (k * f + j)
+                spread[k][c] = value
+        layout = []
+        for k in range(length):
+            local = [(bits[p - k * f], p) for p in range(k * f, (k + 1) * f) if p in pivots]
+            pivot_vars = sum(1 << p for _, p in local)
+            buckets = {}
+            for c in char_set:
+                own = spread[k][c] & ~pivot_vars
+                key = 0
+                for b, p in local:
+                    prow = pivots[p][0] & ~(1 << p)
+                    key |= (((prow & own).bit_count() & 1) ^ ((c >> b) & 1)) << b
+                buckets.setdefault(key, []).append(c)
+            layout.append(([(b, pivots[p][0] & ~(1 << p), pivots[p][1]) for b, p in local], buckets))
+
+        for crc in targets:
+            t = crc ^ base
+            if any((combo & t).bit_count() & 1 for combo in checks):
+                continue
+            # 主元 = 右端 ^ 之前自由变量的奇偶和; 右端只依赖目标值
+            plan = [([(b, prow, (combo & t).bit_count() & 1) for b, prow, combo in local], buckets)
+                    for local, buckets in layout]
+            out = bytearray(length)
+
+            def dfs(k, assign):
+                if k == length:
+                    yield crc, bytes(out)
+                    return
+                local, buckets = plan[k]
+                key = 0
+                for b, prow, rhs in local:
+                    key |= (rhs ^ ((prow & assign).bit_count() & 1)) << b
+                for c in buckets.get(key, ()):
+                    out[k] = c
+                    yield from dfs(k + 1, assign | spread[k][c])
+
+            yield from dfs(0, 0)
+
+    def back_delta(self, diff, length):
+        """目标 CRC 相差 diff 时, 倒推 length 字节后所需寄存器值的差
+
+        CRC 的逐字节更新在 GF(2) 上是线性的, 该差值与后缀内容无关
+        """
+        for _ in range(length):
+            diff = next(self.step_back(diff, 0))
+        return diff
+
+    def method_costs(self):
+        """各搜索方式的加权枚举量 {方式: 代价}, 单位为中间相遇的单步
+
+        每个前缀都要反推一次, 约 4 倍; 线性求解每个节点要算若干次奇偶校验, 约 8 倍;
+        正向表过大时内存吃不消, 不考虑中间相遇
+        """
+        reverse_cost, mitm_cost = self.mitm_cost()
+        costs = {'reverse': reverse_cost * 4, 'linear': self.linear_cost() * 8}
+        if len(self.char_set) ** (self.length // 2) <= MITM_TABLE_LIMIT:
+            costs['mitm'] = mitm_cost
+        return costs
+
+    def choose_method(self, method='auto'):
+        """把 'auto' 解析为具体的搜索方式: 所有长度都按 method_costs 选代价最小的"""
+        if method != 'auto':
+            return method
+        costs = self.method_costs()
+        return min(costs, key=costs.get)
+
+    def iter_mitm(self, targets):
+        """中间相遇: 前半段正向建表, 后半段由目标值反推所需状态, 哈希表连接
+
+        逐个产出 (crc, 结果); 多个目标共用同一张正向表和同一次反向枚举
+        """
         self.init_tables(self.poly)
 
-        desired = self.crc32
+        char_set = sorted(self.char_set)
+        head = self.length // 2
+        tail = self.length - head
+
+        # 正向: 前 head 字节处理后的寄存器值 -> 前缀列表
+        forward = {}
+        for prefix, reg in self.walk(head, self.accum):
+            forward.setdefault(reg, []).append(prefix)
+
+        # 只对第一个目标倒推, 其余目标的所需状态只差一个与后缀无关的常数
+        base = targets[0]
+        deltas = [(crc, self.back_delta(crc ^ base, tail)) for crc in targets]
+
+        # 反向: 从最终寄存器值逐字节倒推, 得到后缀之前必须满足的寄存器值
+        # 栈中携带当前寄存器值, 每个节点只做一次反推
+        stack = [(self.start(base), b'')]
+        while stack:
+            reg, suffix = stack.pop()
+            if len(suffix) == tail:
+                for crc, delta in deltas:
+                    for prefix in forward.get(reg ^ delta, ()):
+                        yield crc, prefix + suffix
+                continue
+            for x in char_set:
+                for prev in self.step_back(reg, x):
+                    stack.append((prev, bytes((x,)) + suffix))
+
+    def iter_reverse(self, targets):
+        """枚举前缀并反推末尾 width/8 字节 (更短时直接枚举), 逐个产出 (crc, 结果)"""
+        self.init_tables(self.poly)
         accum = self.accum
-        result_list = []
-
-        # 处理至少为 4 字节的情况
-        if self.length >= 4:
-            patches = self.find_reverse(desired, accum)
-            for patch in patches:
-                checksum = self.calc(patch, accum)
-                # print(f"verification checksum: 0x{checksum:08x} ({'OK' if checksum == desired else 'ERROR'})")
-            for item in self.dfs(self.length - 4):
-                patch = list(item)
-                patches = self.find_reverse(desired, self.calc(patch, accum))
-                for last_4_bytes in patches:
-                    patch.extend(last_4_bytes)
-                    checksum = self.calc(patch, accum)
-                    if checksum == desired:
-                        result_list.append(bytes(patch))  # 添加符合条件的字节序列
+
+        # 处理长度不小于 width/8 字节的情况
+        n = self.nbytes
+        if self.length >= n:
+            # 末 n 字节与目标值线性相关: 只对第一个目标反推, 其余目标异或一个固定差值
+            base = targets[0]
+            zeros = self.calc(bytes(n))
+            deltas = [(crc, int.from_bytes(bytes(next(iter(self.find_reverse(crc ^ base ^ zeros, 0)))), 'little'))
+                      for crc in targets]
+            allowed = bytes(sorted(self.char_set))
+            for prefix, reg in self.walk(self.length - n, accum):
+                for last_bytes in self.find_reverse(base, reg ^ self.xorout):
+                    patch = int.from_bytes(bytes(last_bytes), 'little')
+                    for crc, delta in deltas:
+                        tail = (patch ^ delta).to_bytes(n, 'little')
+                        # 反推出的字节不受字符集约束, 删去字符集内的字节后为空才算符合
+                        if not tail.translate(None, allowed):
+                            yield crc, prefix + tail  # 产出符合条件的字节序列
+        elif np is not None:
+            # 短数据直接批量枚举全部候选
+            wanted = np.array(targets, dtype=f'uint{self.width}')
+            for block in self.candidate_blocks(self.length):
+                crcs = self.calc_batch(block, accum)
+                hit = np.isin(crcs, wanted)
+                for row, crc in zip(block[hit], crcs[hit].tolist()):
+                    yield crc, bytes(row)
         else:
-            for item in self.dfs(self.length):
-                if self.calc(item) == desired:
-                    result_list.append(bytes(item))  # 添加符合条件的字节序列
-        return result_list
+            wanted = set(targets)
+            for item, reg in self.walk(self.length, accum):
+                crc = reg ^ self.xorout
+                if crc in wanted:
+                    yield crc, item  # 产出符合条件的字节序列
+
+    def iter_multi(self, targets, method='auto'):
+        """一次枚举同时匹配多个目标 CRC 值, 找到一个就产出一个 (crc, 结果)
+
+        method: 'reverse' 枚举前缀并反推最后 width/8 字节, 'mitm' 中间相遇,
+        'linear' GF(2) 线性求解, 'auto' 按枚举量自动选择
+        """
+        targets = list(dict.fromkeys(targets))
+        if not targets:
+            return iter(())
+        method = self.choose_method(method)
+        if method == 'mitm':
+            return self.iter_mitm(targets)
+        if method == 'linear':
+            return self.iter_linear(targets)
+        return self.iter_reverse(targets)
+
+    def run_multi(self, targets, method='auto'):
+        """一次枚举同时匹配多个目标 CRC 值, 返回 {crc: [结果]} (结果经过批量校验并排序)"""
+        results = {crc: [] for crc in targets}
+        for crc, item in self.iter_multi(targets, method):
+            results[crc].append(item)
+        for crc, found in results.items():
+            results[crc] = sorted(self.verify(found, self.accum, crc))
+        return results
+
+    def run_reverse(self, method='auto'):
+        """执行 CRC 反向查找, 返回 self.crc32 的所有结果"""
+        return self.run_multi([self.crc32], method)[self.crc32]
+
+def crc32_reverse(crc32, length, char_set=bytes(range(256)), poly=0xEDB88320, accum=0, method='auto', **model):
+    obj = CRC32Reverse(crc32, length, char_set, poly, accum, **model)
+    return obj.run_reverse(method)  # 返回所有结果
+
+def crc32_reverse_multi(crc_values, length, char_set=bytes(range(256)), poly=0xEDB88320, accum=0,
+                        method='auto', **model):
+    """多个 CRC 值 (相同长度和字符集) 一次枚举全部求解, 返回 {crc: [结果]}
+
+    model: 其他 CRC 参数 (width, reflect, xorout), 默认为标准 CRC32
+    """
+    obj = CRC32Reverse(None, length, char_set, poly, accum, **model)
+    return obj.run_multi(crc_values, method)
+
+def crc32_reverse_iter(crc_values, length, char_set=bytes(range(256)), poly=0xEDB88320, accum=0,
+                       method='auto', **model):
+    """同 crc32_reverse_multi, 但以生成器形式边搜索边产出 (crc, 结果), 可随时停止"""
+    obj = CRC32Reverse(None, length, char_set, poly, accum, **model)
+    return obj.iter_multi(crc_values, method)
+
+def crc_file(path, poly=0xEDB88320, accum=0, **model):
+    """计算文件的 CRC (内存映射 + slicing-by-8), model 同 crc32_reverse_multi"""
+    return CRC32Reverse(None, 0, poly=poly, **model).calc_file(path, accum)
+
+def solve_shard(crc_values, length, char_set, poly, accum, method, head, model):
+    """求解一个分片: 固定前缀 head, 其余字节照常搜索, 所有目标一起匹配 (在子进程中运行)"""
+    obj = CRC32Reverse(None, length - len(head), char_set, poly, accum, **model)
+    # CRC 可以从任意中间状态继续计算, 固定前缀只需折算进初始值
+    obj.accum = obj.calc(head, accum)
+    results = obj.run_multi(crc_values, method)
+    return {crc: [head + item for item in found] for crc, found in results.items()}
+
+def shard_width(length, char_set, workers):
+    """分片前缀的字节数: 分片数不足 worker 的 4 倍时使用两字节前缀"""
+    width = 1 if len(set(char_set)) >= workers * 4 else 2
+    return min(width, length)
+
+def shard_heads(length, char_set, workers, width=None):
+    """按字符集划分前缀空间, 返回所有分片前缀"""
+    char_set = sorted(set(char_set))
+    if width is None:
+        width = shard_width(length, char_set, workers)
+    return [bytes(p) for p in itertools.product(char_set, repeat=width)]
+
+def iter_shards(crc_values, length, char_set=bytes(range(256)), poly=0xEDB88320, accum=0,
+                method='auto', workers=None, done=(), head_width=None, **model):
+    """按完成顺序逐个产出 (分片前缀, {crc: [结果]}), 跳过 done 中已完成的分片
+
+    workers=1 时在当前进程内依次求解; 否则所有分片一起提交到进程池, 空闲的进程自动领取下一个分片
+    """
+    workers = workers or os.cpu_count() or 1
+    heads = [head for head in shard_heads(length, char_set, workers, head_width) if head not in done]
+    if workers == 1:
+        for head in heads:
+            yield head, solve_shard(list(crc_values), length, char_set, poly, accum, method, head, model)
+        return
 
-def crc32_reverse(crc32, length, char_set=bytes(range(256)), poly=0xEDB88320, accum=0):
-    obj = CRC32Reverse(crc32, length, char_set, poly, accum)
-    return obj.run_reverse()  # 返回所有结果
+    pool = ProcessPoolExecutor(max_workers=workers)
+    try:
+        futures = {pool.submit(solve_shard, list(crc_values), length, char_set, poly, accum, method, head, model): head
+                   for head in heads}
+        for future in as_completed(futures):
+            yield futures[future], future.result()
+    finally:
+        # 调用方提前停止时取消尚未开始的分片, 只等待正在运行的分片
+        pool.shutdown(cancel_futures=True)
+
+def crc32_reverse_parallel(crc_values, length, char_set=bytes(range(256)), poly=0xEDB88320,
+                           accum=0, method='auto', workers=None, **model):
+    """多进程爆破多个 CRC 值, 按完成顺序逐个产出 (crc, 结果)
+
+    每个分片一次匹配全部目标, 分片调度见 iter_shards
+    """
+    shards = iter_shards(crc_values, length, char_set, poly, accum, method, workers, **model)
+    try:
+        for head, results in shards:
+            for crc_val, found in results.items():
+                for item in found:
+                    yield crc_val, item
+    finally:
+        shards.close()
 
 def crc32(s):
     return binascii.crc32(s) & 0xFFFFFFFF
 
+def resolve_model(name='crc32', poly=None):
+    """由预设名称得到 (poly, 其他参数); poly 可用常规 (非反射) 表示覆盖预设多项式"""
+    params = dict(CRC_MODELS[name])
+    if poly is not None:
+        params['poly'] = reflect_bits(poly, params['width']) if params['reflect'] else poly
+    return params.pop('poly'), params
+
+def format_crc(value, width=32):
+    """按位宽补零输出 CRC 值"""
+    return f"0x{value:0{width // 4}x}"
+
+def format_result(result):
+    """格式化单个结果: 十六进制 | 字符串"""
+    # 尝试解码为字符串
+    try:
+        decoded = result.decode('utf-8', errors='replace')
+        return f"{result.hex()} | {repr(decoded)}"
+    except:
+        return result.hex()
+
+def plausibility(data):
+    """可读性评分, 越高越像文本: 可打印字符占比 (0-1) + 平均每个二元组的英文频率 (%) + flag 前缀加分
+
+    随机的可打印字符多在 1.0 左右, 英文单词多在 1.5 以上, flag 开头的在 2 以上
+    """
+    if not data:
+        return 0.0
+    printable = sum(b in PRINTABLE_BYTES for b in data) / len(data)
+    text = data.decode('latin-1').lower()
+    bonus = FLAG_BONUS if any(text.startswith(prefix) or (len(text) >= 3 and prefix.startswith(text))
+                              for prefix in FLAG_PREFIXES) else 0.0
+    pairs = len(text) - 1
+    if pairs <= 0:
+        return printable + bonus
+    bigram = sum(ENGLISH_BIGRAMS.get(text[i:i + 2], 0.0) for i in range(pairs)) / pairs
+    return printable + bigram + bonus
+
+class TopResults:
+    """有界最小堆, 在线保留得分最高的 k 个结果 (k=0 表示全部保留)"""
+
+    def __init__(self, k=0):
+        self.k = k
+        self.heap = []
+        self.seq = 0
+
+    def __len__(self):
+        return len(self.heap)
+
+    def push(self, score, item):
+        # seq 保证同分时按出现顺序比较, 不会去比较 bytes
+        entry = (score, -self.seq, item)
+        self.seq += 1
+        if not self.k or len(self.heap) < self.k:
+            heapq.heappush(self.heap, entry)
+        elif entry > self.heap[0]:
+            heapq.heapreplace(self.heap, entry)
+
+    def best(self):
+        """按得分从高到低返回 [(score, item)]"""
+        return [(score, item) for score, _, item in sorted(self.heap, reverse=True)]
+
+class ResultSink:
+    """流式接收 (crc, 结果): 计数、保留前 N 个或得分最高的 N 个、写 JSONL, 并判断能否提前停止
+
+    stop_after: 每个目标都找到 K 个结果后停止; stop_score: 每个目标都出现得分不低于阈值的结果后停止
+    """
+
+    def __init__(self, crc_values, max_results=10, rank=False, stop_after=0, stop_score=None,
+                 jsonl=None, width=32):
+        self.counts = dict.fromkeys(crc_values, 0)
+        self.kept = {crc: TopResults(max_results) if rank else [] for crc in self.counts}
+        self.max_results = max_results
+        self.rank = rank
+        self.stop_after = stop_after
+        self.stop_score = stop_score
+        self.readable = set()
+        self.jsonl = jsonl
+        self.width = width
+
+    def add(self, crc, item):
+        """记录一个结果, 返回 (序号, 得分, 是否保留); 得分只在需要时计算"""
+        self.counts[crc] += 1
+        score = None
+        if self.rank or self.stop_score is not None or self.jsonl:
+            score = plausibility(item)
+        if self.stop_score is not None and score >= self.stop_score:
+            self.readable.add(crc)
+        if self.jsonl:
+            record = {'crc': format_crc(crc, self.width), 'hex': item.hex(),
+                      'text': item.decode('latin-1'), 'score': round(score, 4)}
+            self.jsonl.write(json.dumps(record, ensure_ascii=False) + '\n')
+            self.jsonl.flush()
+        kept = self.kept[crc]
+        if self.rank:
+            kept.push(score, item)
+            return self.counts[crc], score, True
+        if not self.max_results or len(kept) < self.max_results:
+            kept.append(item)
+            return self.counts[crc], score, True
+        return self.counts[crc], score, False
+
+    def done(self):
+        """是否已满足提前停止条件"""
+        if self.stop_after and all(n >= self.stop_after for n in self.counts.values()):
+            return True
+        return self.stop_score is not None and len(self.readable) == len(self.counts)
+
+    def results(self, crc):
+        """该目标保留下来的结果, 排序模式下附带得分"""
+        kept = self.kept[crc]
+        return kept.best() if self.rank else kept
+
+    def state(self):
+        """导出计数和保留的结果, 用于写入断点文件"""
+        kept = {}
+        for crc in self.counts:
+            if self.rank:
+                kept[str(crc)] = [[score, item.hex()] for score, item in self.kept[crc].best()]
+            else:
+                kept[str(crc)] = [item.hex() for item in self.kept[crc]]
+        return {'counts': {str(crc): n for crc, n in self.counts.items()},
+                'kept': kept, 'readable': sorted(self.readable)}
+
+    def load(self, state):
+        """从断点文件恢复计数和保留的结果 (不会重复写 JSONL)"""
+        for crc in self.counts:
+            self.counts[crc] = state['counts'][str(crc)]
+            for entry in state['kept'][str(crc)]:
+                if self.rank:
+                    self.kept[crc].push(entry[0], bytes.fromhex(entry[1]))
+                else:
+                    self.kept[crc].append(bytes.fromhex(entry))
+        self.readable = set(state['readable'])
+
+class Checkpoint:
+    """断点文件: 记录搜索参数、已完成的分片前缀和 ResultSink 的状态
+
+    只在分片边界拍快照, 所以恢复后不会重复计数; 每隔 interval 秒最多写一次, 写入用临时文件 + 原子替换
+    """
+
+    def __init__(self, path, params, interval=30):
+        self.path = path
+        self.params = params
+        self.interval = interval
+        self.done = set()
+        self.width = None
+        self.sink_state = None
+        self.saved_at = time.monotonic()
+
+    def load(self):
+        """读取断点文件, 参数不一致时抛出 ValueError"""
+        with open(self.path, 'r', encoding='utf-8') as f:
+            saved = json.load(f)
+        if saved.get('params') != self.params:
+            raise ValueError('断点文件的搜索参数与当前命令不一致')
+        self.width = saved['width']
+        self.done = {bytes.fromhex(head) for head in saved['done']}
+        self.sink_state = saved['sink']
+
+    def update(self, head, sink):
+        """标记一个分片已完成并更新快照, 距上次写入超过 interval 秒时落盘"""
+        self.done.add(head)
+        self.sink_state = sink.state()
+        if time.monotonic() - self.saved_at >= self.interval:
+            self.save()
+
+    def save(self):
+        tmp_path = f"{self.path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({'params': self.params, 'width': self.width,
+                       'done': sorted(head.hex() for head in self.done), 'sink': self.sink_state}, f)
+        os.replace(tmp_path, self.path)
+        self.saved_at = time.monotonic()
+
+def read_zip_crcs(zip_path):
+    """从 ZIP 中央目录读取每个条目的 (文件名, CRC32, 原始大小), 加密的压缩包同样可读"""
+    with zipfile.ZipFile(zip_path) as zf:
+        return [(info.filename, info.CRC, info.file_size)
+                for info in zf.infolist() if not info.is_dir()]
+
+def crack_zip(zip_path, char_set=bytes(range(256)), max_size=6, method='auto', workers=1):
+    """批量爆破 ZIP 中的小文件: 按原始大小分组, 每组一次枚举, 返回 (条目列表, {文件名: [结果]}, 跳过的条目)"""
+    entries = read_zip_crcs(zip_path)
+    targets = [e for e in entries if 0 < e[2] <= max_size]
+    skipped = [e for e in entries if not 0 < e[2] <= max_size]
+
+    # 按大小分组, 小的先算
+    groups = {}
+    for name, crc_val, size in targets:
+        groups.setdefault(size, []).append(crc_val)
+
+    found = {}
+    for size in sorted(groups):
+        crc_values = list(dict.fromkeys(groups[size]))
+        if workers == 1:
+            found[size] = crc32_reverse_multi(crc_values, size, char_set, method=method)
+        else:
+            found[size] = {crc_val: [] for crc_val in crc_values}
+            for crc_val, item in crc32_reverse_parallel(crc_values, size, char_set,
+                                                        method=method, workers=workers):
+                found[size][crc_val].append(item)
+            for items in found[size].values():
+                items.sort()
+
+    results = {name: found[size][crc_val] for name, crc_val, size in targets}
+    return targets, results, skipped
+
+def print_results(results, max_results, total=None):
+    """按 --max-results 打印一组结果; results 可以是 [(得分, 结果)], total 为实际找到的总数"""
+    if not results:
+        print(f"    未找到匹配结果")
+        return
+
+    total = len(results) if total is None else total
+    display_count = len(results) if max_results == 0 else min(len(results), max_results)
+
+    for i, result in enumerate(results[:display_count], 1):
+        if isinstance(result, tuple):
+            score, result = result
+            print(f"    [{i}] ({score:.3f}) {format_result(result)}")
+        else:
+            print(f"    [{i}] {format_result(result)}")
+
+    if total > display_count:
+        print(f"    ... 还有 {total - display_count} 个结果 (使用 --max-results 0 查看全部)")
+
+    print(f"    总计: {total} 个结果")
+
+def run_zip(zip_path, char_set, args):
+    """ZIP 模式: 读取中央目录中的 CRC 和大小, 批量爆破并按文件名输出"""
+    try:
+        targets, results, skipped = crack_zip(zip_path, char_set, args.max_size,
+                                              args.method, args.workers)
+    except (OSError, zipfile.BadZipFile) as e:
+        print(f"[!] 错误: 无法读取 ZIP '{zip_path}': {e}", file=sys.stderr)
+        sys.exit(1)
+
+    print(f"[*] ZIP: {zip_path}, 待爆破 {len(targets)} 个条目, 跳过 {len(skipped)} 个")
+    if args.verbose:
+        for name, crc_val, size in skipped:
+            print(f"    跳过 {name} ({size} 字节, 超出 --max-size 或为空)")
+    print()
+
+    for name, crc_val, size in targets:
+        print(f"[+] {name} ({size} 字节, CRC32: 0x{crc_val:08x})")
+        print_results(results[name], args.max_results)
+        print()
+
+    # 常见题型: flag 被拆到多个小文件中, 按条目顺序拼接各自的第一个结果
+    if targets and all(results[name] for name, _, _ in targets):
+        joined = b''.join(results[name][0] for name, _, _ in targets)
+        print(f"[*] 按条目顺序拼接首个结果: {format_result(joined)}")
+
+def consume(stream, sink):
+    """把结果流送进 sink 并逐个产出, 满足停止条件后立即关闭生成器 (停止枚举)"""
+    try:
+        for crc_val, result in stream:
+            yield crc_val, result, sink.add(crc_val, result)
+            if sink.done():
+                return
+    finally:
+        stream.close()
+
+def iter_checkpointed(shards, sink, checkpoint):
+    """逐个产出分片中的 (crc, 结果, sink 记录), 每个分片处理完后更新断点; 满足停止条件即结束"""
+    try:
+        for head, results in shards:
+            for crc_val, found in results.items():
+                for item in found:
+                    yield crc_val, item, sink.add(crc_val, item)
+                    if sink.done():
+                        return
+            if checkpoint is not None:
+                checkpoint.update(head, sink)
+    finally:
+        shards.close()
+        if checkpoint is not None:
+            checkpoint.save()
+
+def run_sharded(crc_values, length, char_set, args, poly=0xEDB88320, model=None, sink=None, checkpoint=None):
+    """分片模式 (多进程或断点续跑): 结果一出现就打印, 最后汇总每个 CRC 值的结果数"""
+    model = model or {}
+    width = model.get('width', 32)
+    sink = sink or ResultSink(crc_values, args.max_results, width=width)
+    done, head_width = (), None
+    if checkpoint is not None:
+        if checkpoint.width is None:
+            checkpoint.width = shard_width(length, char_set, args.workers or os.cpu_count() or 1)
+        done, head_width = checkpoint.done, checkpoint.width
+    shards = iter_shards(crc_values, length, char_set, poly, method=args.method, workers=args.workers,
+                         done=done, head_width=head_width, **model)
+    stream = iter_checkpointed(shards, sink, checkpoint)
+    try:
+        for crc_val, result, (n, score, kept) in stream:
+            if kept and not sink.rank:
+                print(f"[+] {format_crc(crc_val, width)} [{n}] {format_result(result)}", flush=True)
+            elif sink.rank and sink.stop_score is not None and score >= sink.stop_score:
+                print(f"[+] {format_crc(crc_val, width)} ({score:.3f}) {format_result(result)}", flush=True)
+    finally:
+        # 被中断时也要立即关闭, 让断点文件写入最后一个完整分片的状态
+        stream.close()
+
+    print()
+    for crc_val, total in sink.counts.items():
+        print(f"[*] {args.model.upper()}: {format_crc(crc_val, width)} 总计: {total} 个结果")
+        if sink.rank or args.resume:
+            # 续跑时之前找到的结果不会再次实时打印, 在汇总中补上
+            print_results(sink.results(crc_val), args.max_results, total)
+
+BENCH_CHARSETS = {
+    'digits': b'0123456789',
+    'hex': b'0123456789abcdef',
+    'lower': b'abcdefghijklmnopqrstuvwxyz',
+    'printable': bytes(range(0x20, 0x7F)),
+    'bytes': bytes(range(256)),
+}
+
+def peak_rss():
+    """进程内存峰值 (KB), 不支持的平台返回 None"""
+    if resource is None:
+        return None
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss // 1024 if sys.platform == 'darwin' else rss  # macOS 单位是字节
+
+def bench_case(name, length, charset, candidates, stream):
+    """计时消费 stream 的每一项, 记录总耗时、首个结果的耗时和候选速率"""
+    start = time.perf_counter()
+    first = None
+    hits = 0
+    for _ in stream:
+        if first is None:
+            first = time.perf_counter() - start
+        hits += 1
+    seconds = time.perf_counter() - start
+    return {'bench': name, 'length': length, 'charset': charset, 'candidates': candidates, 'hits': hits,
+            'seconds': round(seconds, 6), 'rate': round(candidates / seconds, 1) if seconds else None,
+            'first': None if first is None else round(first, 6), 'rss_kb': peak_rss()}
+
+def run_bench(lengths, charsets, limit=200000, model_name='crc32'):
+    """对 calc / find_reverse / dfs 枚举 / 完整搜索分别计时, 逐个产出结果字典"""
+    poly, model = resolve_model(model_name)
+    for name in charsets:
+        char_set = BENCH_CHARSETS[name]
+        obj = CRC32Reverse(None, 0, char_set, poly, **model)
+        obj.init_tables(poly)
+
+        # find_reverse 与长度无关, 每个字符集只测一次
+        desired = [(i * 0x9E3779B97F4A7C15) & obj.mask for i in range(min(limit, 20000))]
+        yield bench_case('find_reverse', obj.nbytes, name, len(desired),
+                         (obj.find_reverse(crc, 0) for crc in desired))
+
+        for length in lengths:
+            total = len(char_set) ** length
+            items = list(itertools.islice(obj.dfs(length), limit))
+            yield bench_case('calc', length, name, len(items), (obj.calc(item) for item in items))
+            yield bench_case('dfs', length, name, len(items), itertools.islice(obj.dfs(length), limit))
+
+            # 完整搜索: 目标取字符集中间的字符重复 length 次, 保证至少有一个结果
+            target = obj.calc(bytes([char_set[len(char_set) // 2]]) * length)
+            search = CRC32Reverse(None, length, char_set, poly, **model)
+            yield from bench_methods(search, target, length, name, total, limit)
+
+def bench_methods(search, target, length, charset, total, limit):
+    """完整搜索: 先把加权代价不超过 limit*16 的方式各强制跑一次, 再跑 auto 并检查它的选择
+
+    auto 一行带 'method' (选中的方式) 和 'check' 字段: 选中了代价超限而被跳过的方式 (此时不运行),
+    或比最快的强制方式慢 2 倍以上时 check 为说明, 否则为 None
+    """
+    costs = search.method_costs()
+    auto = search.choose_method()
+    forced = {}
+    for method in sorted(costs):
+        if costs[method] <= limit * 16:
+            row = bench_case(f'search:{method}', length, charset, total, search.iter_multi([target], method))
+            forced[method] = row['seconds']
+            yield row
+
+    fastest = min(forced, key=forced.get) if forced else None
+    if forced and auto not in forced:
+        row = bench_case('search', length, charset, 0, iter(()))
+        row['check'] = f"auto 选择了 {auto} (代价 {costs[auto]}), 而 {fastest} 只需 {forced[fastest]:.3f}s"
+    else:
+        row = bench_case('search', length, charset, total, search.iter_multi([target]))
+        row['check'] = None
+        if forced and row['seconds'] > 2 * forced[fastest] + 0.01:
+            row['check'] = f"auto 选择的 {auto} 用时 {row['seconds']:.3f}s, 而 {fastest} 只需 {forced[fastest]:.3f}s"
+    row['method'] = auto
+    yield row
+
+def print_bench(row, baseline=None):
+    """打印一行 bench 结果, 有基线时附带速率比"""
+    first = '-' if row['first'] is None else f"{row['first'] * 1000:.2f}"
+    rss = '-' if row['rss_kb'] is None else f"{row['rss_kb'] / 1024:.1f}"
+    line = (f"{row['bench']:<15}{row['length']:>4}  {row['charset']:<10}{row['candidates']:>16}"
+            f"{row['rate'] or 0:>16.0f}{first:>12}{rss:>10}")
+    old = (baseline or {}).get((row['bench'], row['length'], row['charset']))
+    if old and old.get('rate') and row['rate']:
+        line += f"{row['rate'] / old['rate']:>9.2f}x"
+    print(line, flush=True)
+
+def bench_main(argv):
+    """bench 子命令: 测量各环节的候选速率、首个结果耗时和内存峰值, 可输出 JSON 用于版本对比"""
+    parser = argparse.ArgumentParser(
+        prog=f"{os.path.basename(sys.argv[0])} bench",
+        description='测量 CRC 反推引擎各环节的吞吐量')
+    parser.add_argument('-l', '--lengths', type=int, nargs='+', default=[1, 2, 3, 4, 5, 6],
+                        help='测试的数据长度 (默认: 1-6)')
+    parser.add_argument('--charsets', nargs='+', choices=list(BENCH_CHARSETS),
+                        default=['digits', 'hex', 'printable'],
+                        help='测试的字符集 (默认: digits hex printable)')
+    parser.add_argument('--limit', type=int, default=200000,
+                        help='calc / dfs / find_reverse 每项最多测试的候选数 (默认: 200000)')
+    parser.add_argument('--model', choices=list(CRC_MODELS), default='crc32',
+                        help='CRC 算法 (默认: crc32)')
+    parser.add_argument('--json', metavar='FILE',
+                        help='把结果写入 JSON 文件 (- 表示标准输出)')
+    parser.add_argument('--compare', metavar='FILE',
+                        help='与之前保存的 JSON 结果对比, 显示速率比')
+    args = parser.parse_args(argv)
+
+    baseline = {}
+    if args.compare:
+        try:
+            with open(args.compare, 'r', encoding='utf-8') as f:
+                baseline = {(r['bench'], r['length'], r['charset']): r for r in json.load(f)['results']}
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            print(f"[!] 错误: 无法读取基线 '{args.compare}': {e}", file=sys.stderr)
+            sys.exit(1)
+
+    quiet = args.json == '-'
+    if not quiet:
+        print(f"[*] Python {platform.python_version()}, numpy: {'是' if np is not None else '否'}, "
+              f"算法: {args.model}")
+        print(f"{'bench':<15}{'len':>4}  {'charset':<10}{'candidates':>16}{'cand/s':>16}"
+              f"{'first(ms)':>12}{'RSS(MB)':>10}" + (f"{'vs base':>10}" if baseline else ''))
+
+    rows = []
+    for row in run_bench(args.lengths, args.charsets, args.limit, args.model):
+        rows.append(row)
+        if not quiet:
+            print_bench(row, baseline)
+
+    if args.json:
+        report = {'python': platform.python_version(), 'numpy': np is not None, 'model': args.model,
+                  'limit': args.limit, 'results': rows}
+        if quiet:
+            json.dump(report, sys.stdout, indent=2)
+            print()
+        else:
+            with open(args.json, 'w', encoding='utf-8') as f:
+                json.dump(report, f, indent=2)
+            print(f"[*] 结果已写入 {args.json}")
+
+    failed = [row for row in rows if row.get('check')]
+    for row in failed:
+        print(f"[!] 长度 {row['length']} / {row['charset']}: {row['check']}", file=sys.stderr)
+    if failed:
+        sys.exit(1)
+
 def main():
+    if len(sys.argv) > 1 and sys.argv[1] == 'bench':
+        bench_main(sys.argv[2:])
+        return
+
     parser = argparse.ArgumentParser(
         description='CRC32 爆破工具 - 反向推导原始数据',
         formatter_class=argparse.RawDescriptionHelpFormatter,
@@ -122,19 +1269,60 @@ def main():
   %(prog)s -c f72c104b -l 5 --charset "0123456789abcdef"
   %(prog)s -c 0xf72c104b 0x39004188 -l 5
   %(prog)s -c 0xf72c104b -l 4 --printable
+  %(prog)s -c 0x12345678 -l 9 --charset "0123456789abcdef" --method mitm
+  %(prog)s -c 0x12345678 -l 14 --charset "0123456789" --method linear
+  %(prog)s -c 0xf72c104b 0x39004188 -l 6 --printable --workers 0
+  %(prog)s --zip challenge.zip --printable --max-size 5
+  %(prog)s -c 0x12345678 -l 7 --printable --rank --stop-score 2 --jsonl hits.jsonl
+  %(prog)s -c 0x12345678 -l 6 --stop-after 1
+  %(prog)s -c 0x12345678 -l 7 -w 0 --checkpoint crc.ckpt
+  %(prog)s -c 0x12345678 -l 7 -w 0 --checkpoint crc.ckpt --resume
+  %(prog)s -c 0x1234 -l 3 --model crc16
+  %(prog)s -c 0xe3069283 -l 4 --model crc32c
+  %(prog)s --checksum firmware.bin --model crc32-bzip2
+  %(prog)s bench --json bench.json        (性能测试, 详见 bench -h)
         """
     )
 
-    parser.add_argument('-c', '--crc', nargs='+', required=True,
-                        help='CRC32 值 (支持十六进制格式: 0xf72c104b 或 f72c104b)')
-    parser.add_argument('-l', '--length', type=int, required=True,
+    parser.add_argument('-c', '--crc', nargs='+',
+                        help='CRC 值 (支持十六进制格式: 0xf72c104b 或 f72c104b)')
+    parser.add_argument('-l', '--length', type=int,
                         help='原始数据的长度')
+    parser.add_argument('--zip', metavar='ARCHIVE',
+                        help='从 ZIP 中央目录读取所有条目的 CRC 和大小并批量爆破 (无需 -c/-l)')
+    parser.add_argument('--max-size', type=int, default=6,
+                        help='ZIP 模式下只爆破不超过该大小的条目 (默认: 6)')
+    parser.add_argument('--model', choices=list(CRC_MODELS), default='crc32',
+                        help='CRC 算法 (默认: crc32; crc16 为 CRC-16/ARC, crc64 为 CRC-64/XZ)')
+    parser.add_argument('--poly', type=lambda x: int(x, 16),
+                        help='自定义多项式, 十六进制常规表示 (如 0x04C11DB7), 位宽和反射方式沿用 --model')
+    parser.add_argument('--checksum', nargs='+', metavar='FILE',
+                        help='按 --model/--poly 计算文件的 CRC (大文件使用内存映射和 slicing-by-8)')
     parser.add_argument('--charset', type=str,
                         help='自定义字符集 (默认: 所有字节 0-255)')
     parser.add_argument('--printable', action='store_true',
                         help='仅使用可打印 ASCII 字符 (0x20-0x7E)')
     parser.add_argument('--max-results', type=int, default=10,
                         help='每个 CRC 值显示的最大结果数 (默认: 10, 0=全部)')
+    parser.add_argument('--stop-after', type=int, default=0, metavar='K',
+                        help='每个 CRC 值都找到 K 个结果后立即停止搜索 (默认: 0=搜索完整空间)')
+    parser.add_argument('--rank', action='store_true',
+                        help='按可读性评分 (可打印占比 + 英文二元组 + flag 前缀) 在线排序, 只保留得分最高的 --max-results 个')
+    parser.add_argument('--stop-score', type=float, metavar='SCORE',
+                        help='每个 CRC 值都出现评分不低于 SCORE 的结果后立即停止搜索 (英文约 1.5, flag 开头约 2 以上)')
+    parser.add_argument('--jsonl', metavar='FILE',
+                        help='把每个结果以 JSON Lines 格式实时写入文件 (- 表示标准输出)')
+    parser.add_argument('--checkpoint', metavar='FILE',
+                        help='按分片搜索并定期把进度写入断点文件 (中断后配合 --resume 继续)')
+    parser.add_argument('--checkpoint-interval', type=float, default=30, metavar='SECONDS',
+                        help='两次写入断点文件的最短间隔秒数 (默认: 30)')
+    parser.add_argument('--resume', action='store_true',
+                        help='从 --checkpoint 指定的断点文件继续, 跳过已完成的分片')
+    parser.add_argument('--method', choices=['auto', 'reverse', 'mitm', 'linear'], default='auto',
+                        help='搜索方式: reverse=枚举前缀+反推末 width/8 字节, mitm=中间相遇, '
+                             'linear=GF(2) 线性求解 (适合数字/十六进制等小字符集) (默认: auto 按枚举量选择)')
+    parser.add_argument('-w', '--workers', type=int, default=1,
+                        help='并行进程数 (默认: 1, 0=CPU 核数), 按前缀分片并同时处理所有 CRC 值')
     parser.add_argument('-v', '--verbose', action='store_true',
                         help='显示详细信息')
 
@@ -148,6 +1336,27 @@ def main():
     else:
         char_set = bytes(range(256))  # 所有字节
 
+    if args.zip:
+        # ZIP 中记录的总是标准 CRC32
+        run_zip(args.zip, char_set, args)
+        return
+
+    poly, model = resolve_model(args.model, args.poly)
+    width = model['width']
+
+    if args.checksum:
+        for path in args.checksum:
+            try:
+                print(f"{format_crc(crc_file(path, poly, **model), width)}  {path}")
+            except OSError as e:
+                print(f"[!] 错误: 无法读取文件 '{path}': {e}", file=sys.stderr)
+        return
+
+    if not args.crc or args.length is None:
+        parser.error('需要 -c/--crc 和 -l/--length, 或使用 --zip')
+    if args.resume and not args.checkpoint:
+        parser.error('--resume 需要配合 --checkpoint 指定断点文件')
+
     # 处理 CRC 值列表
     crc_values = []
     for crc_str in args.crc:
@@ -162,48 +1371,84 @@ def main():
                 except ValueError:
                     # 尝试十进制解析
                     crc_val = int(crc_str, 10)
+            if crc_val >> width:
+                raise ValueError
             crc_values.append(crc_val)
         except ValueError:
             print(f"[!] 错误: 无法解析 CRC 值 '{crc_str}'", file=sys.stderr)
             sys.exit(1)
 
     if args.verbose:
+        print(f"[*] CRC 算法: {args.model} (poly={format_crc(poly, width)})")
         print(f"[*] 字符集大小: {len(char_set)}")
         print(f"[*] 数据长度: {args.length}")
         print(f"[*] CRC 值数量: {len(crc_values)}")
+        obj = CRC32Reverse(0, args.length, char_set, poly, **model)
+        reverse_cost, mitm_cost = obj.mitm_cost()
+        print(f"[*] 枚举量: 反推 {reverse_cost}, 中间相遇 {mitm_cost}, 线性求解 {obj.linear_cost()}")
+        print(f"[*] 搜索方式: {obj.choose_method(args.method)}")
         print()
 
-    # 对每个 CRC 值进行爆破
-    for idx, crc_val in enumerate(crc_values, 1):
-        print(f"[+] CRC32: 0x{crc_val:08x}")
-
+    if args.jsonl == '-':
+        jsonl = sys.stdout
+    elif args.jsonl:
         try:
-            results = crc32_reverse(crc_val, args.length, char_set)
+            jsonl = open(args.jsonl, 'a', encoding='utf-8')
+        except OSError as e:
+            print(f"[!] 错误: 无法写入 '{args.jsonl}': {e}", file=sys.stderr)
+            sys.exit(1)
+    else:
+        jsonl = None
+    sink = ResultSink(crc_values, args.max_results, args.rank, args.stop_after, args.stop_score,
+                      jsonl, width)
 
-            if not results:
-                print(f"    未找到匹配结果")
-            else:
-                total = len(results)
-                display_count = total if args.max_results == 0 else min(total, args.max_results)
-
-                for i, result in enumerate(results[:display_count], 1):
-                    # 尝试解码为字符串
-                    try:
-                        decoded = result.decode('utf-8', errors='replace')
-                        print(f"    [{i}] {result.hex()} | {repr(decoded)}")
-                    except:
-                        print(f"    [{i}] {result.hex()}")
-
-                if total > display_count:
-                    print(f"    ... 还有 {total - display_count} 个结果 (使用 --max-results 0 查看全部)")
-
-                print(f"    总计: {total} 个结果")
-
-        except Exception as e:
-            print(f"[!] 错误: {e}", file=sys.stderr)
-            if args.verbose:
-                import traceback
-                traceback.print_exc()
+    checkpoint = None
+    if args.checkpoint:
+        # 影响分片内容或结果保留方式的参数必须一致才能续跑
+        params = {'crc': crc_values, 'length': args.length, 'charset': char_set.hex(), 'poly': poly,
+                  'model': model, 'method': args.method, 'max_results': args.max_results, 'rank': args.rank}
+        checkpoint = Checkpoint(args.checkpoint, params, args.checkpoint_interval)
+        if args.resume:
+            try:
+                checkpoint.load()
+                sink.load(checkpoint.sink_state)
+            except (OSError, ValueError, KeyError, TypeError) as e:
+                print(f"[!] 错误: 无法从断点 '{args.checkpoint}' 恢复: {e}", file=sys.stderr)
+                sys.exit(1)
+            print(f"[*] 从断点恢复: 已完成 {len(checkpoint.done)} 个分片")
+
+    try:
+        if args.workers != 1 or checkpoint is not None:
+            run_sharded(crc_values, args.length, char_set, args, poly, model, sink, checkpoint)
+            return
+
+        # 所有 CRC 值共用一次枚举, 边搜索边记录, 满足停止条件即结束
+        stream = crc32_reverse_iter(crc_values, args.length, char_set, poly, method=args.method, **model)
+        for _ in consume(stream, sink):
+            pass
+    except KeyboardInterrupt:
+        print("\n[!] 爆破被中断", file=sys.stderr)
+        sys.exit(1)
+    except Exception as e:
+        print(f"[!] 错误: {e}", file=sys.stderr)
+        if args.verbose:
+            import traceback
+            traceback.print_exc()
+        sys.exit(1)
+    finally:
+        if jsonl not in (None, sys.stdout):
+            jsonl.close()
+
+    if sink.done() and args.verbose:
+        print("[*] 已满足停止条件, 提前结束搜索")
+        print()
+
+    for idx, crc_val in enumerate(crc_values, 1):
+        print(f"[+] {args.model.upper()}: {format_crc(crc_val, width)}")
+        results = sink.results(crc_val)
+        if not sink.rank:
+            results = sorted(results)
+        print_results(results, args.max_results, sink.counts[crc_val])
 
         if idx < len(crc_values):
             print()
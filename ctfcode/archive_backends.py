@@ -0,0 +1,446 @@
+#!/usr/bin/env python3
+"""
+压缩包解压后端
+压缩包套娃.py 和 压缩包套娃2.py 共用: 按魔数识别格式, 每种格式注册一个流式解压器
+"""
+import io
+import os
+import importlib.util
+import time
+import subprocess
+import tarfile
+import zipfile
+import gzip
+import zlib
+import bz2
+import lzma
+from functools import partial
+
+try:
+    import zstandard  # 可选, 用于 zstd
+except ImportError:
+    zstandard = None
+
+# 流式解压时每次复制的块大小
+COPY_CHUNK = 1 << 20
+
+# 解压出的数据少于这个字节数时不检查压缩比 (小文件的压缩比没有意义)
+RATIO_MIN_BYTES = 1 << 20
+
+# 嗅探时读取的文件头长度: tar 的 ustar 标记在偏移 257, 压缩过的 tar 要多读一些才能解出第一个 512 字节块
+SNIFF_SIZE = 4096
+
+# bz2 要解完整个块才有输出, 块大小由文件头 'BZh1'..'BZh9' 决定 (100k..900k 未压缩),
+# 压缩后的块最多比原数据略大, 按这个比例多读一些才能看到 tar 头
+BZ2_BLOCK_SLACK = 9 / 8
+
+# (偏移, 魔数, 类型), 按顺序匹配
+MAGIC_SIGNATURES = [
+    (0, b'PK\x03\x04', 'zip'),
+    (0, b'PK\x05\x06', 'zip'),  # 空压缩包
+    (0, b'PK\x07\x08', 'zip'),  # 分卷
+    (0, b'Rar!\x1a\x07\x00', 'rar'),  # RAR4
+    (0, b'Rar!\x1a\x07\x01\x00', 'rar'),  # RAR5
+    (0, b"7z\xbc\xaf'\x1c", '7z'),
+    (0, b'\x1f\x8b', 'gz'),
+    (0, b'BZh', 'bz2'),
+    (0, b'\xfd7zXZ\x00', 'xz'),
+    (0, b'\x28\xb5\x2f\xfd', 'zst'),
+    (257, b'ustar', 'tar'),
+]
+
+# 检测结果缓存: (路径, mtime, 大小) -> 类型
+DETECT_CACHE = {}
+
+# 解压文件头时可能出现的异常 (数据截断或不是该格式)
+DECODE_ERRORS = (zlib.error, OSError, EOFError, lzma.LZMAError, ValueError)
+if zstandard is not None:
+    DECODE_ERRORS += (zstandard.ZstdError,)
+
+# 格式名 -> {'extensions', 'module', 'extract', 'unpack'}, 由 register_backend 填充;
+# module 为解压必需且没有外部命令可以替代的可选模块 (如 zstandard), 缺少时 extract_to/unpack_bytes 直接报错;
+# 按注册顺序匹配扩展名, 所以 tar.* 排在单独的压缩流前面
+BACKENDS = {}
+
+def register_backend(name, extensions, extract, unpack=None, module=None):
+    """注册一种格式: extract(路径, 输出目录, 密码, guard) 解压到目录, unpack(字节, 密码, guard) 返回 [(成员名, 数据)]"""
+    BACKENDS[name] = {'extensions': list(extensions), 'module': module, 'extract': extract, 'unpack': unpack}
+
+def is_lzma_alone(head):
+    """LZMA-alone 没有魔数: 检查属性字节、字典大小和未压缩大小是否合理"""
+    if len(head) < 13 or head[0] != 0x5D:
+        return False
+    dict_size = int.from_bytes(head[1:5], 'little')
+    size = head[5:13]
+    return 1 << 12 <= dict_size <= 1 << 30 and (size == b'\xff' * 8 or int.from_bytes(size, 'little') < 1 << 40)
+
+def peek_decompressed(kind, head, size=512):
+    """在内存中解压文件头的前 size 字节, 失败返回 b''"""
+    try:
+        if kind == 'gz':
+            return zlib.decompressobj(31).decompress(head, size)
+        if kind == 'bz2':
+            return bz2.BZ2Decompressor().decompress(head, size)
+        if kind in ('xz', 'lzma'):
+            return lzma.LZMADecompressor().decompress(head, size)
+        if kind == 'zst' and zstandard is not None:
+            return zstandard.ZstdDecompressor().decompressobj().decompress(head)[:size]
+    except DECODE_ERRORS:
+        pass
+    return b''
+
+def sniff_size(head):
+    """识别类型需要的文件头长度: 一般为 SNIFF_SIZE, bz2 要读完第一个块"""
+    if head[:3] == b'BZh' and head[3:4].isdigit():
+        return max(SNIFF_SIZE, int(int(head[3:4]) * 100000 * BZ2_BLOCK_SLACK))
+    return SNIFF_SIZE
+
+def sniff_archive_type(head):
+    """根据文件头的魔数判断类型, 压缩流会再看解压出的第一个块是否是 tar"""
+    kind = None
+    for offset, magic, name in MAGIC_SIGNATURES:
+        if head[offset:offset + len(magic)] == magic:
+            kind = name
+            break
+    if kind is None and is_lzma_alone(head):
+        kind = 'lzma'
+    if kind in STREAM_CODECS:
+        if peek_decompressed(kind, head)[257:262] == b'ustar':
+            kind = 'tar.' + kind
+    return kind
+
+def detect_archive_type(filepath):
+    """检测压缩包类型（读取文件头魔数，识别不了时按扩展名判断）"""
+    try:
+        st = os.stat(filepath)
+    except OSError:
+        return None
+    key = (os.path.abspath(filepath), st.st_mtime_ns, st.st_size)
+    if key not in DETECT_CACHE:
+        DETECT_CACHE[key] = guess_archive_type(filepath)
+    return DETECT_CACHE[key]
+
+def guess_archive_type(filepath):
+    """先嗅探魔数, 再退回到扩展名"""
+    try:
+        with open(filepath, 'rb') as f:
+            head = f.read(SNIFF_SIZE)
+            size = sniff_size(head)
+            if size > len(head) == SNIFF_SIZE:
+                head += f.read(size - len(head))
+            archive_type = sniff_archive_type(head)
+        if archive_type:
+            return archive_type
+    except OSError:
+        pass
+    return guess_by_extension(filepath)
+
+def guess_by_extension(filepath):
+    """根据扩展名判断"""
+    filepath_lower = filepath.lower()
+    for format_type, info in BACKENDS.items():
+        for ext in info['extensions']:
+            if filepath_lower.endswith(ext):
+                return format_type
+
+    return None
+
+def decompressed_name(archive_path, archive_type):
+    """单文件压缩流解压后的文件名: 去掉对应扩展名, 没有扩展名时加 .out"""
+    name = os.path.basename(archive_path)
+    for ext in BACKENDS[archive_type]['extensions']:
+        if name.lower().endswith(ext) and len(name) > len(ext):
+            return name[:-len(ext)]
+    return name + '.out'
+
+class LimitExceeded(Exception):
+    """解压超出资源限制 (疑似压缩炸弹)"""
+
+class ResourceGuard:
+    """解压资源限制: 单层/累计解压字节数、压缩比、单层成员数和总耗时, 0 表示不限制
+
+    解压时每写出一块数据就调用 add, 成员开始前调用 member (可带声明的大小提前拒绝), 超限抛出 LimitExceeded
+    """
+
+    def __init__(self, layer_size=0, total_size=0, ratio=0, members=0, seconds=0):
+        self.layer_size = layer_size
+        self.total_size = total_size
+        self.ratio = ratio
+        self.members = members
+        self.seconds = seconds
+        self.start = time.monotonic()
+        self.total = 0
+        self.layer_in = 0
+        self.layer_out = 0
+        self.layer_members = 0
+
+    def begin_layer(self, compressed_size):
+        """开始新的一层, compressed_size 为这一层压缩数据的大小"""
+        self.layer_in = compressed_size
+        self.layer_out = 0
+        self.layer_members = 0
+        self.check()
+
+    def member(self, declared_size=0):
+        """记录一个成员; declared_size 为头部声明的解压大小, 超限时不必解压就能拒绝"""
+        self.layer_members += 1
+        if self.members and self.layer_members > self.members:
+            raise LimitExceeded(f"单层成员数超过 {self.members}")
+        self.check(declared_size)
+
+    def account(self, size):
+        """记录其他进程已经写出的字节数, 只检查累计字节数和耗时"""
+        self.total += size
+        if self.total_size and self.total > self.total_size:
+            raise LimitExceeded(f"累计解压超过 {self.total_size} 字节")
+        if self.seconds and time.monotonic() - self.start > self.seconds:
+            raise LimitExceeded(f"总耗时超过 {self.seconds} 秒")
+
+    def add(self, size):
+        """记录实际写出的字节数"""
+        self.layer_out += size
+        self.total += size
+        self.check()
+
+    def check(self, pending=0):
+        out = self.layer_out + pending
+        if self.layer_size and out > self.layer_size:
+            raise LimitExceeded(f"单层解压超过 {self.layer_size} 字节")
+        if self.total_size and self.total + pending > self.total_size:
+            raise LimitExceeded(f"累计解压超过 {self.total_size} 字节")
+        if self.ratio and out > RATIO_MIN_BYTES and out > self.ratio * max(self.layer_in, 1):
+            raise LimitExceeded(f"压缩比超过 {self.ratio}")
+        if self.seconds and time.monotonic() - self.start > self.seconds:
+            raise LimitExceeded(f"总耗时超过 {self.seconds} 秒")
+
+def copy_stream(src, dst, guard=None):
+    """分块复制解压流, 每块都记入 guard; 返回复制的字节数"""
+    total = 0
+    while True:
+        chunk = src.read(COPY_CHUNK)
+        if not chunk:
+            return total
+        if guard is not None:
+            guard.add(len(chunk))
+        dst.write(chunk)
+        total += len(chunk)
+
+def read_all(src, guard=None):
+    """分块读出整个解压流, 每块都记入 guard"""
+    out = io.BytesIO()
+    copy_stream(src, out, guard)
+    return out.getvalue()
+
+def member_path(base, name):
+    """成员在输出目录中的路径: 去掉盘符、绝对路径和 .. 之类的部分, 全部去掉后返回 None"""
+    parts = [part for part in name.replace('\\', '/').split('/') if part not in ('', '.', '..')]
+    if parts and len(parts[0]) == 2 and parts[0][1] == ':':
+        parts = parts[1:]
+    return os.path.join(base, *parts) if parts else None
+
+def open_zst(source):
+    """以流的方式打开 zstd 数据 (需要 zstandard 模块)"""
+    if zstandard is None:
+        raise RuntimeError("缺少 zstandard 模块 (pip install zstandard)")
+    if isinstance(source, str):
+        source = open(source, 'rb')
+    return zstandard.ZstdDecompressor().stream_reader(source)
+
+# 单独的压缩流: 格式名 -> 打开函数 (接受路径或文件对象, 返回解压后的只读流)
+STREAM_CODECS = {
+    'gz': gzip.open,
+    'bz2': bz2.open,
+    'xz': lzma.open,
+    'lzma': lzma.open,  # FORMAT_AUTO 同时支持 xz 和 lzma-alone
+    'zst': open_zst,
+}
+
+def open_stream(archive_path, archive_type):
+    """以流的方式打开压缩文件, 返回解压后的只读文件对象; tar.* 返回解压后的 tar 流
+
+    archive_path 也可以是已经打开的文件对象 (内存模式传入 BytesIO)
+    """
+    if archive_type.startswith('tar.'):
+        archive_type = archive_type[4:]
+    if archive_type in STREAM_CODECS:
+        return STREAM_CODECS[archive_type](archive_path)
+    return open(archive_path, 'rb')
+
+def zip_extractall(zip_ref, path, password=None, guard=None):
+    """逐个成员流式解压 zip, 先按声明大小检查限制, 写入时再按实际字节数检查"""
+    for info in zip_ref.infolist():
+        if guard is not None:
+            guard.member(info.file_size)
+        target = member_path(path, info.filename)
+        if target is None:
+            continue
+        if info.is_dir():
+            os.makedirs(target, exist_ok=True)
+            continue
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        with zip_ref.open(info, pwd=password) as src, open(target, 'wb') as dst:
+            copy_stream(src, dst, guard)
+
+def tar_extractall(tar_ref, path, guard=None):
+    """逐个成员解压 tar, 支持时使用 data 过滤器拒绝绝对路径和 .. 之类的成员
+
+    tar 头中的大小就是实际写出的大小, 所以在写出之前检查 guard
+    """
+    kwargs = {'filter': 'data'} if hasattr(tarfile, 'data_filter') else {}
+    for member in tar_ref:
+        if guard is not None:
+            guard.member(member.size if member.isfile() else 0)
+        tar_ref.extract(member, path, **kwargs)
+        if guard is not None and member.isfile():
+            guard.add(member.size)
+
+def extract_zip(archive_path, output_dir, password=None, guard=None):
+    with zipfile.ZipFile(archive_path, 'r') as zip_ref:
+        zip_extractall(zip_ref, output_dir, password, guard)
+
+def unpack_zip(data, password=None, guard=None):
+    members = []
+    with zipfile.ZipFile(io.BytesIO(data)) as zip_ref:
+        for info in zip_ref.infolist():
+            if guard is not None:
+                guard.member(info.file_size)
+            if not info.is_dir():
+                with zip_ref.open(info, pwd=password) as src:
+                    members.append((info.filename, read_all(src, guard)))
+    return members
+
+def extract_rar(archive_path, output_dir, password=None, guard=None):
+    try:
+        import rarfile
+        with rarfile.RarFile(archive_path, 'r') as rar_ref:
+            if password is not None:
+                rar_ref.setpassword(password.decode('latin-1'))
+            if guard is not None:
+                for info in rar_ref.infolist():
+                    guard.member(info.file_size)
+            rar_ref.extractall(output_dir)
+    except ImportError:
+        print("[!] 缺少 rarfile 模块，尝试使用 unrar 命令")
+        pw_arg = [f"-p{password.decode('latin-1')}"] if password is not None else []
+        subprocess.run(['unrar', 'x', *pw_arg, archive_path, output_dir], check=True)
+
+def unpack_rar(data, password=None, guard=None):
+    try:
+        import rarfile
+    except ImportError:
+        raise NotImplementedError("缺少 rarfile 模块")
+    with rarfile.RarFile(io.BytesIO(data)) as rar_ref:
+        if password is not None:
+            rar_ref.setpassword(password.decode('latin-1'))
+        infos = [info for info in rar_ref.infolist() if not info.is_dir()]
+        if guard is not None:
+            for info in infos:
+                guard.member(info.file_size)
+        return [(info.filename, rar_ref.read(info)) for info in infos]
+
+def extract_7z(archive_path, output_dir, password=None, guard=None):
+    try:
+        import py7zr
+        with py7zr.SevenZipFile(archive_path, 'r',
+                                password=None if password is None else password.decode('latin-1')) as z:
+            if guard is not None:
+                for info in z.list():
+                    guard.member(info.uncompressed or 0)
+            z.extractall(output_dir)
+    except ImportError:
+        print("[!] 缺少 py7zr 模块，尝试使用 7z 命令")
+        pw_arg = [f"-p{password.decode('latin-1')}"] if password is not None else []
+        subprocess.run(['7z', 'x', *pw_arg, f'-o{output_dir}', archive_path], check=True)
+
+def unpack_7z(data, password=None, guard=None):
+    try:
+        import py7zr
+    except ImportError:
+        raise NotImplementedError("缺少 py7zr 模块")
+    with py7zr.SevenZipFile(io.BytesIO(data), 'r',
+                            password=None if password is None else password.decode('latin-1')) as z:
+        if not hasattr(z, 'readall'):
+            raise NotImplementedError("当前 py7zr 版本不支持读入内存")
+        if guard is not None:
+            for info in z.list():
+                guard.member(info.uncompressed or 0)
+        return [(name, bio.read()) for name, bio in z.readall().items()]
+
+def extract_tar(archive_path, output_dir, password=None, guard=None, codec=None):
+    # 流式读取: 边解压边写出成员, 不把整个 tar 读入内存, 也不调用外部 tar
+    with open_stream(archive_path, codec or 'tar') as src, \
+            tarfile.open(fileobj=src, mode='r|') as tar_ref:
+        tar_extractall(tar_ref, output_dir, guard)
+
+def unpack_tar(data, password=None, guard=None, codec=None):
+    if codec is not None:
+        # 压缩层已经嗅探过, 直接解压 (tarfile 自带的识别只认默认字典大小的 lzma-alone)
+        data = unpack_stream(data, guard=guard, codec=codec)[0][1]
+    members = []
+    with tarfile.open(fileobj=io.BytesIO(data), mode='r:') as tar_ref:
+        for member in tar_ref:
+            # 压缩过的 tar 在解压外层时已经计过字节数
+            counted = codec is None and member.isfile()
+            if guard is not None:
+                guard.member(member.size if counted else 0)
+            if member.isfile():
+                members.append((member.name, tar_ref.extractfile(member).read()))
+                if guard is not None and counted:
+                    guard.add(member.size)
+    return members
+
+def extract_stream(archive_path, output_dir, password=None, guard=None, codec=None):
+    # 单独的压缩流, 分块复制到输出文件
+    output_file = os.path.join(output_dir, decompressed_name(archive_path, codec))
+    with open_stream(archive_path, codec) as src, open(output_file, 'wb') as dst:
+        copy_stream(src, dst, guard)
+
+def unpack_stream(data, password=None, guard=None, codec=None):
+    # 分块解压, 压缩炸弹在超过限制时就会停下, 不会先把数据全部解到内存里
+    with open_stream(io.BytesIO(data), codec) as src:
+        return [('', read_all(src, guard))]
+
+# rar/7z 缺少模块时改用 unrar/7z 命令, 不登记 module
+register_backend('zip', ['.zip'], extract_zip, unpack_zip)
+register_backend('rar', ['.rar'], extract_rar, unpack_rar)
+register_backend('7z', ['.7z'], extract_7z, unpack_7z)
+for _codec, _extensions in [('gz', ['.tar.gz', '.tgz']), ('bz2', ['.tar.bz2', '.tbz2']), ('xz', ['.tar.xz', '.txz']),
+                            ('lzma', ['.tar.lzma', '.tlz']), ('zst', ['.tar.zst', '.tzst'])]:
+    register_backend('tar.' + _codec, _extensions, partial(extract_tar, codec=_codec),
+                     partial(unpack_tar, codec=_codec), module='zstandard' if _codec == 'zst' else None)
+register_backend('tar', ['.tar'], extract_tar, unpack_tar)
+for _codec in STREAM_CODECS:
+    register_backend(_codec, ['.' + _codec], partial(extract_stream, codec=_codec),
+                     partial(unpack_stream, codec=_codec), module='zstandard' if _codec == 'zst' else None)
+
+def missing_module(archive_type):
+    """这种格式必需但没有安装的模块名, 都已安装时返回 None"""
+    module = BACKENDS[archive_type]['module']
+    if module is not None and importlib.util.find_spec(module) is None:
+        return module
+    return None
+
+def extract_to(archive_path, output_dir, archive_type=None, password=None, guard=None):
+    """用注册的后端把一层解压到 output_dir (archive_type 为空时自动检测), 返回类型; 无法识别时返回 None"""
+    archive_type = archive_type or detect_archive_type(archive_path)
+    if archive_type not in BACKENDS:
+        return None
+    module = missing_module(archive_type)
+    if module is not None:
+        raise RuntimeError(f"解压 {archive_type} 需要 {module} 模块 (pip install {module})")
+    if guard is not None:
+        guard.begin_layer(os.path.getsize(archive_path))
+    BACKENDS[archive_type]['extract'](archive_path, output_dir, password, guard)
+    return archive_type
+
+def unpack_bytes(data, archive_type, password=None, guard=None):
+    """在内存中解压一层, 返回 [(成员名, 数据)]; 内存中无法处理的格式抛出 NotImplementedError"""
+    backend = BACKENDS.get(archive_type)
+    if backend is None or backend['unpack'] is None:
+        raise NotImplementedError(f"不支持在内存中解压 {archive_type}")
+    module = missing_module(archive_type)
+    if module is not None:
+        raise NotImplementedError(f"缺少 {module} 模块")
+    if guard is not None:
+        guard.begin_layer(len(data))
+    return backend['unpack'](data, password, guard)
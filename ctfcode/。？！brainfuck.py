@@ -4,7 +4,9 @@ Short Ook / Brainfuck 解码工具
 支持 Short Ook (。？！ 符号) 到 Brainfuck 的转换和执行
 """
 import sys
+import hashlib
 import argparse
+from array import array
 
 # Short Ook -> Brainfuck 映射表
 SHORT_OOK_MAPPING = {
@@ -34,70 +36,309 @@ def short_ook_to_brainfuck(code):
 
     return bf_code
 
-def execute_brainfuck(bf_code, memory_size=30000, verbose=False):
-    """执行 Brainfuck 代码"""
-    cells = [0] * memory_size
-    ptr = 0
-    pc = 0
-    output = []
+# IR 指令: (操作, 参数)
+OP_ADD = 0    # 当前格加 n (已折叠连续的 +/-)
+OP_MOVE = 1   # 指针移动 n (已折叠连续的 </>)
+OP_OPEN = 2   # [ : 当前格为 0 时跳到对应 ] 之后, 参数为跳转目标
+OP_CLOSE = 3  # ] : 当前格不为 0 时跳回对应 [ 之后
+OP_SET = 4    # 当前格设为 n ([-] 以及其后的 +/-)
+OP_MUL = 5    # 乘法/复制循环: 参数为 (方向, ((偏移, 倍数), ...), 最小偏移, 最大偏移), 执行后当前格清零
+OP_SCAN = 6   # 扫描循环 [>] [<] [>>]: 按步长移动指针直到当前格为 0
+OP_OUT = 7    # .
+OP_IN = 8     # ,
+
+IR_NAMES = ['add', 'move', 'open', 'close', 'set', 'mul', 'scan', 'out', 'in']
+
+class TapeOverflow(Exception):
+    """纸带扩展后超过上限: 参数为格子数上限"""
+
+# 每格的位数 -> array 类型码 (8 位使用 bytearray); 'I' 在个别平台上只有 2 字节, 此时用 'L'
+CELL_TYPECODES = {16: 'H', 32: 'I' if array('I').itemsize >= 4 else 'L'}
+
+def new_tape(size, cell_bits=8):
+    """长度为 size 的全零纸带: 8 位为 bytearray, 16/32 位为 array"""
+    if cell_bits == 8:
+        return bytearray(size)
+    return array(CELL_TYPECODES[cell_bits], bytes(size * array(CELL_TYPECODES[cell_bits]).itemsize))
+
+def grow_tape(tape, ptr, limit):
+    """指针越过纸带两端时原地扩展纸带 (每次至少翻倍), 返回 (新的指针, 新的长度)
+
+    向左扩展时在开头补零, 原有格子整体右移, 所以指针要加上补的长度; 超过 limit 个格子时抛出 TapeOverflow
+    """
+    size = len(tape)
+    extra = max(size, -ptr if ptr < 0 else ptr - size + 1)
+    if size + extra > limit:
+        raise TapeOverflow(limit)
+    pad = bytearray(extra) if isinstance(tape, bytearray) else array(tape.typecode, bytes(extra * tape.itemsize))
+    if ptr < 0:
+        tape[0:0] = pad
+        ptr += extra
+    else:
+        tape.extend(pad)
+    return ptr, len(tape)
 
-    # 预处理循环跳转位置
-    loop_stack = []
-    loops = {}
+def compile_brainfuck(bf_code, cell_bits=8):
+    """把 Brainfuck 编译成 IR: 折叠连续的 +-<>, 识别清零、乘法/复制和扫描循环, 预先算好跳转目标
 
+    cell_bits 为每格的位数 (决定回绕的模数); 括号不匹配时抛出 ValueError
+    """
+    mod = 1 << cell_bits
+    ir = []
+    stack = []  # [循环开始处的 IR 位置, 循环体是否只含 +-<>]
     for idx, command in enumerate(bf_code):
-        if command == '[':
-            loop_stack.append(idx)
+        if command in '+-':
+            n = 1 if command == '+' else -1
+            if ir and ir[-1][0] in (OP_ADD, OP_SET):
+                op, value = ir.pop()
+                n += value
+                if op == OP_SET:
+                    ir.append((OP_SET, n % mod))
+                    continue
+            if n % mod:
+                ir.append((OP_ADD, n))
+        elif command in '<>':
+            n = 1 if command == '>' else -1
+            # 纸带向两端自动扩展, 所以 <<>> 这样的往返可以直接抵消
+            if ir and ir[-1][0] == OP_MOVE:
+                n += ir.pop()[1]
+            if n:
+                ir.append((OP_MOVE, n))
+        elif command in '.,[':
+            # 外层循环体里有了 I/O 或嵌套循环, 不再是可识别的写法
+            if stack:
+                stack[-1][1] = False
+            if command == '[':
+                stack.append([len(ir), True])
+                ir.append((OP_OPEN, None))
+            else:
+                ir.append((OP_OUT if command == '.' else OP_IN, 0))
         elif command == ']':
-            if not loop_stack:
-                print(f"[!] 错误: 第 {idx} 位置的 ']' 没有对应的 '['", file=sys.stderr)
-                return None
-            start = loop_stack.pop()
-            loops[start] = idx
-            loops[idx] = start
-
-    if loop_stack:
-        print(f"[!] 错误: 有 {len(loop_stack)} 个未闭合的 '['", file=sys.stderr)
+            if not stack:
+                raise ValueError(f"第 {idx} 位置的 ']' 没有对应的 '['")
+            start, simple = stack.pop()
+            idiom = loop_idiom(ir[start + 1:], mod) if simple else None
+            if idiom is not None:
+                del ir[start:]
+                # 设值后紧跟的清零循环结果总是 0, 只保留后者; 之后的 +/- 会在上面合并进 SET
+                if idiom[0] == OP_SET and ir and ir[-1][0] == OP_SET:
+                    ir.pop()
+                ir.append(idiom)
+            else:
+                ir.append((OP_CLOSE, None))
+    if stack:
+        raise ValueError(f"有 {len(stack)} 个未闭合的 '['")
+
+    # 折叠和识别循环会改变指令位置, 最后统一回填跳转目标
+    for pc, (op, arg) in enumerate(ir):
+        if op == OP_OPEN:
+            stack.append(pc)
+        elif op == OP_CLOSE:
+            start = stack.pop()
+            ir[start] = (OP_OPEN, pc + 1)
+            ir[pc] = (OP_CLOSE, start + 1)
+    return ir
+
+def loop_idiom(body, mod=256):
+    """识别只含 +-<> 的循环体, 返回等价的单条 IR 指令, 不是可识别的写法时返回 None (mod 为每格的模数)"""
+    if len(body) == 1 and body[0][0] == OP_MOVE:
+        return (OP_SCAN, body[0][1])
+    offset = low = high = 0
+    deltas = {}
+    for op, n in body:
+        if op == OP_MOVE:
+            offset += n
+            low = min(low, offset)
+            high = max(high, offset)
+        elif op == OP_ADD:
+            deltas[offset] = deltas.get(offset, 0) + n
+        else:
+            return None
+    # 指针净移动为 0, 且当前格每轮 ±1 时循环次数就是当前格的值 (或其补数)
+    if offset != 0 or deltas.get(0, 0) % mod not in (1, mod - 1):
+        return None
+    direction = -1 if deltas.pop(0) % mod == mod - 1 else 1
+    targets = tuple((off, n) for off, n in sorted(deltas.items()) if n % mod)
+    if not targets:
+        return (OP_SET, 0)
+    # 纸带按循环体中指针到过的最远位置扩展, 与逐条执行时一致
+    return (OP_MUL, (direction, targets, low, high))
+
+# JIT 编译结果缓存: (每格位数, 程序的 SHA-256) -> 函数
+JIT_CACHE = {}
+
+def jit_source(ir, cell_bits=8):
+    """把 IR 翻译成 Python 源码: 循环对应嵌套的 while, 纸带 t、指针 p、纸带长度 M 都是局部变量
+
+    生成的函数为 bf_main(t, o, M, g): o 为输出的 append, g 为 grow_tape (已绑定上限)
+    """
+    mask = (1 << cell_bits) - 1
+    lines = ['def bf_main(t, o, M, g):', '    p = 0']
+    indent = '    '
+
+    def bounds(offset, expr='p'):
+        # 只检查移动方向上的一端, 越过时扩展纸带; 向左扩展后原有格子右移, 指针随之调整
+        if offset > 0:
+            lines.append(f"{indent}if {expr} >= M: M = g(t, {expr})[1]")
+        elif offset < 0 and expr == 'p':
+            lines.append(f"{indent}if p < 0: p, M = g(t, p)")
+        elif offset < 0:
+            lines.append(f"{indent}if {expr} < 0: p, M = g(t, {expr}); p -= {offset}")
+
+    for op, arg in ir:
+        if op == OP_ADD:
+            lines.append(f"{indent}t[p] = (t[p] + {arg}) & {mask}")
+        elif op == OP_MOVE:
+            lines.append(f"{indent}p += {arg}")
+            bounds(arg)
+        elif op == OP_OPEN:
+            lines.append(f"{indent}while t[p]:")
+            indent += '    '
+        elif op == OP_CLOSE:
+            if lines[-1].endswith(':'):
+                lines.append(f"{indent}pass")
+            indent = indent[:-4]
+        elif op == OP_SET:
+            lines.append(f"{indent}t[p] = {arg}")
+        elif op == OP_MUL:
+            direction, targets, low, high = arg
+            lines.append(f"{indent}v = t[p]")
+            lines.append(f"{indent}if v:")
+            indent += '    '
+            bounds(high, f"p + {high}")
+            bounds(low, f"p + {low}")
+            if direction > 0:
+                lines.append(f"{indent}v = {mask + 1} - v")
+            for offset, factor in targets:
+                term = 'v' if factor == 1 else f"v * {factor}"
+                lines.append(f"{indent}t[p + {offset}] = (t[p + {offset}] + {term}) & {mask}")
+            lines.append(f"{indent}t[p] = 0")
+            indent = indent[:-4]
+        elif op == OP_SCAN:
+            lines.append(f"{indent}while t[p]:")
+            lines.append(f"{indent}    p += {arg}")
+            indent += '    '
+            bounds(arg)
+            indent = indent[:-4]
+        elif op == OP_OUT:
+            lines.append(f"{indent}o(t[p])")
+        elif op == OP_IN:
+            # CTF 通常不需要输入
+            lines.append(f"{indent}t[p] = 0")
+    return '\n'.join(lines) + '\n'
+
+def jit_compile(bf_code, ir, cell_bits=8):
+    """用 compile()/exec 把 IR 编译成 Python 函数 (见 jit_source), 按每格位数和程序的哈希缓存
+
+    嵌套过深 (Python 限制约 20 层循环) 时抛出 SyntaxError, 由调用方改用 IR 解释执行
+    """
+    key = (cell_bits, hashlib.sha256(bf_code.encode('utf-8')).hexdigest())
+    if key not in JIT_CACHE:
+        namespace = {}
+        exec(compile(jit_source(ir, cell_bits), f"<brainfuck {key[1][:12]}>", 'exec'), namespace)
+        JIT_CACHE[key] = namespace['bf_main']
+    return JIT_CACHE[key]
+
+def run_ir(ir, tape, output, limit, cell_bits=8):
+    """逐条解释执行 IR (JIT 不可用时使用), 纸带越过两端时扩展"""
+    mask = (1 << cell_bits) - 1
+    size = len(ir)
+    memory_size = len(tape)
+    ptr = 0
+    pc = 0
+    while pc < size:
+        op, arg = ir[pc]
+
+        if op == OP_ADD:
+            tape[ptr] = (tape[ptr] + arg) & mask
+        elif op == OP_MOVE:
+            ptr += arg
+            if ptr >= memory_size or ptr < 0:
+                ptr, memory_size = grow_tape(tape, ptr, limit)
+        elif op == OP_OPEN:
+            if tape[ptr] == 0:
+                pc = arg
+                continue
+        elif op == OP_CLOSE:
+            if tape[ptr] != 0:
+                pc = arg
+                continue
+        elif op == OP_SET:
+            tape[ptr] = arg
+        elif op == OP_MUL:
+            value = tape[ptr]
+            if value:
+                direction, targets, low, high = arg
+                if ptr + high >= memory_size:
+                    memory_size = grow_tape(tape, ptr + high, limit)[1]
+                if ptr + low < 0:
+                    ptr, memory_size = grow_tape(tape, ptr + low, limit)
+                    ptr -= low
+                if direction > 0:
+                    value = mask + 1 - value
+                for offset, factor in targets:
+                    tape[ptr + offset] = (tape[ptr + offset] + value * factor) & mask
+                tape[ptr] = 0
+        elif op == OP_SCAN:
+            while tape[ptr]:
+                ptr += arg
+                if ptr >= memory_size or ptr < 0:
+                    ptr, memory_size = grow_tape(tape, ptr, limit)
+        elif op == OP_OUT:
+            output.append(tape[ptr])
+        elif op == OP_IN:
+            # CTF 通常不需要输入
+            tape[ptr] = 0
+
+        pc += 1
+
+def execute_brainfuck(bf_code, memory_size=30000, verbose=False, jit=True, cell_bits=8, max_memory=1 << 26):
+    """执行 Brainfuck 代码 (先编译成 IR, 见 compile_brainfuck)
+
+    纸带初始长度为 memory_size, 每格 cell_bits (8/16/32) 位并自动回绕, 指针越过两端时自动扩展, 最多 max_memory 格;
+    jit 为 True 时把 IR 翻译成 Python 函数执行 (见 jit_compile), 无法编译时退回逐条解释 IR
+    """
+    cells = new_tape(memory_size, cell_bits)
+    output = []
+
+    try:
+        ir = compile_brainfuck(bf_code, cell_bits)
+    except ValueError as e:
+        print(f"[!] 错误: {e}", file=sys.stderr)
         return None
 
     if verbose:
         print(f"[*] Brainfuck 代码长度: {len(bf_code)}")
-        print(f"[*] 循环数量: {len(loop_stack)}")
+        print(f"[*] 循环数量: {bf_code.count('[')}")
+        counts = {}
+        for op, _ in ir:
+            counts[IR_NAMES[op]] = counts.get(IR_NAMES[op], 0) + 1
+        print(f"[*] IR 指令数: {len(ir)} ({', '.join(f'{name} {n}' for name, n in counts.items())})")
+
+    program = None
+    if jit:
+        try:
+            program = jit_compile(bf_code, ir, cell_bits)
+        except (SyntaxError, RecursionError, MemoryError) as e:
+            if verbose:
+                print(f"[*] JIT 编译失败 ({e}), 改为解释执行 IR")
+    if verbose:
+        print(f"[*] {'使用 JIT 执行' if program is not None else '解释执行 IR'}, 每格 {cell_bits} 位")
         print()
 
-    # 执行 Brainfuck 代码
     try:
-        while pc < len(bf_code):
-            command = bf_code[pc]
-
-            if command == '>':
-                ptr += 1
-                if ptr >= memory_size:
-                    print(f"[!] 错误: 指针越界 (>{memory_size})", file=sys.stderr)
-                    return None
-            elif command == '<':
-                ptr -= 1
-                if ptr < 0:
-                    print(f"[!] 错误: 指针越界 (<0)", file=sys.stderr)
-                    return None
-            elif command == '+':
-                cells[ptr] = (cells[ptr] + 1) % 256
-            elif command == '-':
-                cells[ptr] = (cells[ptr] - 1) % 256
-            elif command == '.':
-                output.append(chr(cells[ptr]))
-            elif command == ',':
-                # CTF 通常不需要输入
-                cells[ptr] = 0
-            elif command == '[':
-                if cells[ptr] == 0:
-                    pc = loops[pc]
-            elif command == ']':
-                if cells[ptr] != 0:
-                    pc = loops[pc]
-
-            pc += 1
-
+        if program is not None:
+            program(cells, output.append, len(cells), lambda tape, ptr: grow_tape(tape, ptr, max_memory))
+        else:
+            run_ir(ir, cells, output, max_memory, cell_bits)
+        if cell_bits == 32:
+            # 超出 Unicode 范围的值输出替换字符
+            result = ''.join(chr(c) if c < 0x110000 else '\ufffd' for c in output)
+        else:
+            result = ''.join(map(chr, output))
+    except TapeOverflow as e:
+        print(f"[!] 错误: 纸带超过 {e.args[0]} 格", file=sys.stderr)
+        return None
     except KeyboardInterrupt:
         print("\n[!] 执行被中断", file=sys.stderr)
         return None
@@ -105,7 +346,9 @@ def execute_brainfuck(bf_code, memory_size=30000, verbose=False):
         print(f"[!] 执行错误: {e}", file=sys.stderr)
         return None
 
-    return ''.join(output)
+    if verbose:
+        print(f"[*] 纸带最终长度: {len(cells)} 格 ({len(cells) * (cell_bits // 8)} 字节)")
+    return result
 
 def main():
     parser = argparse.ArgumentParser(
@@ -126,6 +369,7 @@ Short Ook 符号映射:
   %(prog)s -c "。。。。！？！！。？？！"
   %(prog)s -f cipher.txt
   %(prog)s -f cipher.txt --show-bf
+  %(prog)s -f cipher.txt --cell-bits 16
         """
     )
 
@@ -134,7 +378,13 @@ Short Ook 符号映射:
     parser.add_argument('--show-bf', action='store_true',
                        help='显示转换后的 Brainfuck 代码')
     parser.add_argument('-m', '--memory', type=int, default=30000,
-                       help='内存大小 (默认: 30000)')
+                       help='纸带初始长度, 指针越过两端时自动扩展 (默认: 30000)')
+    parser.add_argument('--max-memory', type=int, default=1 << 26,
+                       help='纸带最多扩展到的格数 (默认: 67108864)')
+    parser.add_argument('--cell-bits', type=int, choices=[8, 16, 32], default=8,
+                       help='每格的位数, 溢出时回绕 (默认: 8)')
+    parser.add_argument('--no-jit', action='store_true',
+                       help='不编译成 Python 函数, 逐条解释执行 IR')
     parser.add_argument('-v', '--verbose', action='store_true',
                        help='显示详细信息')
 
@@ -166,7 +416,8 @@ Short Ook 符号映射:
 
     # 执行 Brainfuck
     print("[*] 执行结果:")
-    result = execute_brainfuck(bf_code, memory_size=args.memory, verbose=args.verbose)
+    result = execute_brainfuck(bf_code, memory_size=args.memory, verbose=args.verbose, jit=not args.no_jit,
+                               cell_bits=args.cell_bits, max_memory=args.max_memory)
 
     if result:
         print(result)
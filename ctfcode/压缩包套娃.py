@@ -3,67 +3,276 @@
 压缩包套娃解压工具
 自动递归解压嵌套的压缩包，支持多种格式
 """
+import io
 import os
+import re
 import sys
+import time
+import copy
+import struct
+import itertools
 import argparse
-import subprocess
 import shutil
+import json
+import zipfile
+import hashlib
+from contextlib import contextmanager, nullcontext
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
 from pathlib import Path
 
-# 支持的压缩格式
-SUPPORTED_FORMATS = {
-    'zip': {'extensions': ['.zip'], 'module': 'zipfile'},
-    'rar': {'extensions': ['.rar'], 'module': 'rarfile'},
-    '7z': {'extensions': ['.7z'], 'module': 'py7zr'},
-    'tar.gz': {'extensions': ['.tar.gz', '.tgz'], 'module': None},
-    'tar.bz2': {'extensions': ['.tar.bz2', '.tbz2'], 'module': None},
-    'tar.xz': {'extensions': ['.tar.xz', '.txz'], 'module': None},
-    'gz': {'extensions': ['.gz'], 'module': None},
-    'bz2': {'extensions': ['.bz2'], 'module': None},
-    'xz': {'extensions': ['.xz'], 'module': None},
-}
-
-def detect_archive_type(filepath):
-    """检测压缩包类型（使用 file 命令和扩展名）"""
-    # 尝试使用 file 命令
+from archive_backends import (COPY_CHUNK, LimitExceeded, ResourceGuard,
+                              detect_archive_type, sniff_size, sniff_archive_type, guess_by_extension,
+                              decompressed_name, extract_to, unpack_bytes)
+
+# 密码破解时每个任务检查的候选数
+PASSWORD_BATCH = 20000
+
+# 未指定 --digits 时尝试的纯数字位数: zip 可以用校验字节快速筛选, 7z/rar 每个候选都要完整解密, 只试到 4 位
+DEFAULT_DIGITS = {'zip': 6}
+DEFAULT_DIGITS_SLOW = 4
+
+# 逐层统计的阶段: 识别类型、计算摘要、密码破解、解压、文件系统 (写出/移动/清理临时目录)
+PROFILE_PHASES = ('detect', 'hash', 'password', 'decompress', 'filesystem')
+
+# ZipCrypto 密钥更新使用的 CRC32 表
+ZIP_CRC_TABLE = []
+for _n in range(256):
+    _c = _n
+    for _ in range(8):
+        _c = (_c >> 1) ^ 0xEDB88320 if _c & 1 else _c >> 1
+    ZIP_CRC_TABLE.append(_c)
+
+def as_file(source):
+    """source 可以是路径或内存中的字节, 统一成 zipfile/py7zr 等能打开的对象"""
+    return io.BytesIO(source) if isinstance(source, (bytes, bytearray)) else source
+
+def archive_hints(source, archive_type, name):
+    """从一层压缩包收集可能的密码提示: 文件名 (含去掉扩展名的部分)、成员名、注释及注释中的单词"""
+    hints = [name, os.path.splitext(name)[0]]
+    if archive_type == 'zip':
+        try:
+            with zipfile.ZipFile(as_file(source)) as zf:
+                comments = [zf.comment]
+                for info in zf.infolist():
+                    member = os.path.basename(info.filename.rstrip('/'))
+                    hints += [member, os.path.splitext(member)[0]]
+                    comments.append(info.comment)
+        except (zipfile.BadZipFile, OSError):
+            comments = []
+        for comment in comments:
+            if comment:
+                hints.append(comment.strip())
+                hints += re.split(rb'[\s:=,;]+', comment)
+    return [h.encode('utf-8', 'replace') if isinstance(h, str) else h for h in hints if h]
+
+def zipcrypto_check(password, header, check):
+    """用 ZipCrypto 的 12 字节加密头快速验证密码: 解密后最后一个字节应等于校验字节 (约 1/256 误报)"""
+    crc = ZIP_CRC_TABLE
+    k0, k1, k2 = 0x12345678, 0x23456789, 0x34567890
+    for c in password:
+        k0 = crc[(k0 ^ c) & 0xFF] ^ (k0 >> 8)
+        k1 = ((k1 + (k0 & 0xFF)) * 134775813 + 1) & 0xFFFFFFFF
+        k2 = crc[(k2 ^ (k1 >> 24)) & 0xFF] ^ (k2 >> 8)
+    for c in header:
+        t = k2 | 2
+        c ^= ((t * (t ^ 1)) >> 8) & 0xFF
+        k0 = crc[(k0 ^ c) & 0xFF] ^ (k0 >> 8)
+        k1 = ((k1 + (k0 & 0xFF)) * 134775813 + 1) & 0xFFFFFFFF
+        k2 = crc[(k2 ^ (k1 >> 24)) & 0xFF] ^ (k2 >> 8)
+    return c == check
+
+def zip_crypto_header(source):
+    """找出最小的加密成员, 返回 (成员, 12 字节加密头, 校验字节); 没有加密成员返回 None"""
+    with zipfile.ZipFile(as_file(source)) as zf:
+        infos = [info for info in zf.infolist() if info.flag_bits & 1 and not info.is_dir()]
+    if not infos:
+        return None
+    info = min(infos, key=lambda i: i.compress_size)
+    if info.compress_type == 99:
+        raise RuntimeError("AES 加密的 ZIP 暂不支持")
+    f = as_file(source)
+    if not isinstance(f, io.BytesIO):
+        f = open(f, 'rb')
+    with f:
+        f.seek(info.header_offset)
+        local = f.read(30)
+        if local[:4] != b'PK\x03\x04':
+            raise zipfile.BadZipFile("本地文件头损坏")
+        name_len, extra_len = struct.unpack('<HH', local[26:30])
+        f.seek(name_len + extra_len, 1)
+        header = f.read(12)
+    if info.flag_bits & 0x8:
+        # 使用数据描述符时, 校验字节取自修改时间的高字节
+        h, m, sec = info.date_time[3:]
+        check = ((h << 11 | m << 5 | sec // 2) >> 8) & 0xFF
+    else:
+        check = info.CRC >> 24
+    return info, header, check
+
+def is_encrypted(source, archive_type):
+    """判断这一层是否需要密码 (缺少对应模块时视为未加密)"""
     try:
-        result = subprocess.run(['file', filepath],
-                              capture_output=True, text=True, timeout=5)
-        output = result.stdout.lower()
-
-        if 'gzip compressed data' in output:
-            if filepath.endswith('.tar.gz') or filepath.endswith('.tgz'):
-                return 'tar.gz'
-            return 'gz'
-        elif 'bzip2 compressed data' in output:
-            if filepath.endswith('.tar.bz2') or filepath.endswith('.tbz2'):
-                return 'tar.bz2'
-            return 'bz2'
-        elif 'xz compressed data' in output:
-            if filepath.endswith('.tar.xz') or filepath.endswith('.txz'):
-                return 'tar.xz'
-            return 'xz'
-        elif 'zip archive' in output:
-            return 'zip'
-        elif '7-zip archive' in output:
-            return '7z'
-        elif 'rar archive' in output:
-            return 'rar'
-    except (subprocess.TimeoutExpired, FileNotFoundError):
+        if archive_type == 'zip':
+            with zipfile.ZipFile(as_file(source)) as zf:
+                return any(info.flag_bits & 1 for info in zf.infolist())
+        if archive_type == '7z':
+            import py7zr
+            with py7zr.SevenZipFile(as_file(source), 'r') as z:
+                return z.needs_password()
+        if archive_type == 'rar':
+            import rarfile
+            with rarfile.RarFile(as_file(source)) as rf:
+                return rf.needs_password()
+    except ImportError:
         pass
+    except Exception:
+        return False
+    return False
+
+def try_password(source, archive_type, password):
+    """完整验证一个密码 (会解压数据), 正确返回 True"""
+    try:
+        if archive_type == 'zip':
+            info = zip_crypto_header(source)[0]
+            with zipfile.ZipFile(as_file(source)) as zf:
+                zf.read(info, pwd=password)  # 解压并校验 CRC
+            return True
+        if archive_type == '7z':
+            import py7zr
+            with py7zr.SevenZipFile(as_file(source), 'r', password=password.decode('latin-1')) as z:
+                return z.testzip() is None
+        if archive_type == 'rar':
+            import rarfile
+            with rarfile.RarFile(as_file(source)) as rf:
+                rf.setpassword(password.decode('latin-1'))
+                rf.testrar()
+            return True
+    except Exception:
+        return False
+    return False
+
+def password_candidates(hints=(), wordlist=None, digits=0):
+    """按顺序产出候选密码: 提示 (文件名、注释等) → 字典 → 1 到 digits 位的纯数字"""
+    seen = set()
+    for hint in hints:
+        if hint not in seen:
+            seen.add(hint)
+            yield hint
+    if wordlist:
+        with open(wordlist, 'rb') as f:
+            for line in f:
+                yield line.rstrip(b'\r\n')
+    for n in range(1, digits + 1):
+        for i in range(10 ** n):
+            yield b'%0*d' % (n, i)
+
+def check_passwords(archive_type, job, batch):
+    """检查一批候选密码 (可在子进程中运行): zip 只用加密头筛选, 其余格式逐个完整尝试"""
+    if archive_type == 'zip':
+        header, check = job
+        return [pw for pw in batch if zipcrypto_check(pw, header, check)]
+    return [pw for pw in batch if try_password(job, archive_type, pw)]
+
+def find_password(source, archive_type, hints=(), crack=None, verbose=False):
+    """破解一层的密码, 找到返回 bytes, 否则返回 None
+
+    crack: {'wordlist': 字典文件, 'digits': 数字位数 (None 时见 DEFAULT_DIGITS), 'workers': 进程数};
+    zip 先用 ZipCrypto 校验字节在进程池中批量筛选, 通过的再完整解压确认; 7z/rar 需要 source 为路径
+    """
+    crack = crack or {}
+    if archive_type == 'zip':
+        info, header, check = zip_crypto_header(source)
+        job = (header, check)
+        zf = zipfile.ZipFile(as_file(source))
+    else:
+        job = source
+        zf = None
+    digits = crack.get('digits', 0)
+    if digits is None:
+        digits = DEFAULT_DIGITS.get(archive_type, DEFAULT_DIGITS_SLOW)
+        if verbose:
+            print(f"[*] 尝试 1 到 {digits} 位的纯数字密码")
+    candidates = password_candidates(hints, crack.get('wordlist'), digits)
+    batches = iter(lambda: list(itertools.islice(candidates, PASSWORD_BATCH)), [])
+    workers = crack.get('workers') or os.cpu_count() or 1
+    tried = 0
+
+    def confirm(found):
+        # 通过快速筛选的密码 (zip 约 1/256 误报) 再解压最小的成员确认
+        for pw in found:
+            if zf is None:
+                return pw
+            try:
+                zf.read(info, pwd=pw)
+                return pw
+            except Exception:
+                continue
+        return None
 
-    # 根据扩展名判断
-    filepath_lower = filepath.lower()
-    for format_type, info in SUPPORTED_FORMATS.items():
-        for ext in info['extensions']:
-            if filepath_lower.endswith(ext):
-                return format_type
+    if workers == 1:
+        try:
+            for batch in batches:
+                tried += len(batch)
+                password = confirm(check_passwords(archive_type, job, batch))
+                if password is not None:
+                    return password
+        finally:
+            if zf is not None:
+                zf.close()
+        if verbose:
+            print(f"[*] 已尝试 {tried} 个密码")
+        return None
 
+    pool = ProcessPoolExecutor(max_workers=workers)
+    try:
+        pending = {}
+        for batch in batches:
+            pending[pool.submit(check_passwords, archive_type, job, batch)] = len(batch)
+            # 只预先提交少量任务, 避免把整个候选集都生成到内存里
+            while len(pending) >= workers * 2:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    tried += pending.pop(future)
+                    password = confirm(future.result())
+                    if password is not None:
+                        return password
+        for future in list(pending):
+            tried += pending.pop(future)
+            password = confirm(future.result())
+            if password is not None:
+                return password
+    finally:
+        pool.shutdown(cancel_futures=True)
+        if zf is not None:
+            zf.close()
+    if verbose:
+        print(f"[*] 已尝试 {tried} 个密码")
     return None
 
-def extract_archive(archive_path, output_dir=None, verbose=False):
-    """解压单个压缩包"""
-    archive_type = detect_archive_type(archive_path)
+def unlock(source, archive_type, name, hints, crack, verbose=False):
+    """加密层的密码阶段: 未加密返回 (False, None), 否则返回 (True, 密码或 None)"""
+    if crack is None or not is_encrypted(source, archive_type):
+        return False, None
+    print(f"[*] {name} 已加密, 尝试破解密码")
+    try:
+        password = find_password(source, archive_type, hints, crack, verbose)
+    except (RuntimeError, zipfile.BadZipFile, OSError) as e:
+        print(f"[!] 无法破解: {e}")
+        return True, None
+    if password is None:
+        print(f"[!] 未找到 {name} 的密码")
+    else:
+        print(f"[+] {name} 的密码: {password.decode('latin-1')}")
+    return True, password
+
+def extract_archive(archive_path, output_dir=None, verbose=False, archive_type=None, password=None, guard=None,
+                    profile=None):
+    """解压单个压缩包 (archive_type 为空时自动检测, password 为 bytes)
+
+    guard 为 ResourceGuard 时边解压边检查资源限制, 超限时清理临时目录并抛出 LimitExceeded;
+    profile 为 LayerProfile 时把解压和移动文件的耗时、解出的字节数记到当前层
+    """
+    archive_type = archive_type or detect_archive_type(archive_path)
 
     if not archive_type:
         if verbose:
@@ -74,84 +283,43 @@ def extract_archive(archive_path, output_dir=None, verbose=False):
         output_dir = os.path.dirname(archive_path) or '.'
 
     temp_dir = os.path.join(output_dir, '.unzip_temp')
-    os.makedirs(temp_dir, exist_ok=True)
+    with timer(profile, 'filesystem'):
+        os.makedirs(temp_dir, exist_ok=True)
 
     try:
         if verbose:
             print(f"[*] 解压 {os.path.basename(archive_path)} ({archive_type})")
+        # 按格式交给 archive_backends 中注册的解压器
+        with timer(profile, 'decompress'):
+            extract_to(archive_path, temp_dir, archive_type, password, guard)
 
-        # 使用对应的方法解压
-        if archive_type == 'zip':
-            import zipfile
-            with zipfile.ZipFile(archive_path, 'r') as zip_ref:
-                zip_ref.extractall(temp_dir)
+        with timer(profile, 'filesystem'):
+            # 检查解压出的文件
+            extracted_files = os.listdir(temp_dir)
 
-        elif archive_type == 'rar':
-            try:
-                import rarfile
-                with rarfile.RarFile(archive_path, 'r') as rar_ref:
-                    rar_ref.extractall(temp_dir)
-            except ImportError:
-                print("[!] 缺少 rarfile 模块，尝试使用 unrar 命令")
-                subprocess.run(['unrar', 'x', archive_path, temp_dir], check=True)
-
-        elif archive_type == '7z':
-            try:
-                import py7zr
-                with py7zr.SevenZipFile(archive_path, 'r') as z:
-                    z.extractall(temp_dir)
-            except ImportError:
-                print("[!] 缺少 py7zr 模块，尝试使用 7z 命令")
-                subprocess.run(['7z', 'x', f'-o{temp_dir}', archive_path], check=True)
-
-        elif archive_type == 'tar.gz':
-            subprocess.run(['tar', '-xzf', archive_path, '-C', temp_dir], check=True)
-
-        elif archive_type == 'tar.bz2':
-            subprocess.run(['tar', '-xjf', archive_path, '-C', temp_dir], check=True)
-
-        elif archive_type == 'tar.xz':
-            subprocess.run(['tar', '-xJf', archive_path, '-C', temp_dir], check=True)
-
-        elif archive_type == 'gz':
-            # 单独的 gzip 文件
-            output_file = os.path.join(temp_dir, os.path.basename(archive_path)[:-3])
-            subprocess.run(['gunzip', '-c', archive_path],
-                         stdout=open(output_file, 'wb'), check=True)
-
-        elif archive_type == 'bz2':
-            output_file = os.path.join(temp_dir, os.path.basename(archive_path)[:-4])
-            subprocess.run(['bunzip2', '-c', archive_path],
-                         stdout=open(output_file, 'wb'), check=True)
-
-        elif archive_type == 'xz':
-            output_file = os.path.join(temp_dir, os.path.basename(archive_path)[:-3])
-            subprocess.run(['unxz', '-c', archive_path],
-                         stdout=open(output_file, 'wb'), check=True)
-
-        # 检查解压出的文件
-        extracted_files = os.listdir(temp_dir)
-
-        if len(extracted_files) == 0:
-            print(f"[!] 警告: 没有解压出任何文件")
-            os.rmdir(temp_dir)
-            return None
+            if len(extracted_files) == 0:
+                print(f"[!] 警告: 没有解压出任何文件")
+                os.rmdir(temp_dir)
+                return None
 
-        # 将文件移动到输出目录
-        for item in extracted_files:
-            src = os.path.join(temp_dir, item)
-            dst = os.path.join(output_dir, item)
+            if profile is not None:
+                profile.set(bytes_out=sum(tree_size(os.path.join(temp_dir, item)) for item in extracted_files))
 
-            # 如果目标已存在，先删除
-            if os.path.exists(dst):
-                if os.path.isdir(dst):
-                    shutil.rmtree(dst)
-                else:
-                    os.remove(dst)
+            # 将文件移动到输出目录
+            for item in extracted_files:
+                src = os.path.join(temp_dir, item)
+                dst = os.path.join(output_dir, item)
 
-            shutil.move(src, dst)
+                # 如果目标已存在，先删除
+                if os.path.exists(dst):
+                    if os.path.isdir(dst):
+                        shutil.rmtree(dst)
+                    else:
+                        os.remove(dst)
 
-        os.rmdir(temp_dir)
+                shutil.move(src, dst)
+
+            os.rmdir(temp_dir)
 
         if verbose:
             print(f"[+] 解压成功: {', '.join(extracted_files)}")
@@ -159,77 +327,675 @@ def extract_archive(archive_path, output_dir=None, verbose=False):
         # 返回第一个文件（通常套娃压缩包只有一个文件）
         return os.path.join(output_dir, extracted_files[0])
 
+    except LimitExceeded:
+        if os.path.exists(temp_dir):
+            shutil.rmtree(temp_dir)
+        raise
+
     except Exception as e:
         print(f"[!] 解压失败: {e}")
         if os.path.exists(temp_dir):
             shutil.rmtree(temp_dir)
         return None
 
-def recursive_extract(archive_path, max_depth=1000, verbose=False):
-    """递归解压嵌套压缩包"""
-    current_file = os.path.abspath(archive_path)
-    depth = 0
-
-    print(f"[*] 开始解压: {os.path.basename(current_file)}")
+def write_layer(output_dir, name, data):
+    """把内存中的一层写到输出目录 (只保留文件名部分), 返回路径"""
+    path = os.path.join(output_dir, os.path.basename(name.replace('\\', '/')) or 'output.bin')
+    with open(path, 'wb') as f:
+        f.write(data)
+    return path
+
+class LayerProfile:
+    """逐层性能统计: 每层各阶段 (见 PROFILE_PHASES) 的耗时、输入/输出字节数和格式
+
+    每层开始时调用 begin, 各阶段用 with profile.phase(...) 包起来; 最后一条记录是最终文件 (类型为 None)
+    """
+
+    def __init__(self):
+        self.layers = []
+        self.start = time.perf_counter()
+
+    def begin(self, depth, name, bytes_in):
+        self.layers.append(dict({'depth': depth, 'name': name, 'type': None, 'bytes_in': bytes_in, 'bytes_out': 0},
+                                **{phase: 0.0 for phase in PROFILE_PHASES}))
+
+    @contextmanager
+    def phase(self, phase):
+        t = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.layers[-1][phase] += time.perf_counter() - t
+
+    def set(self, **fields):
+        """更新当前层的字段 (type, bytes_out)"""
+        self.layers[-1].update(fields)
+
+    def summary(self, top=10):
+        """汇总: 各阶段总耗时、总字节数、按格式的直方图和最慢的 top 层"""
+        layers = [layer for layer in self.layers if layer['type']]
+        formats = {}
+        for layer in layers:
+            stat = formats.setdefault(layer['type'], {'layers': 0, 'seconds': 0.0, 'decompress': 0.0,
+                                                      'bytes_in': 0, 'bytes_out': 0})
+            stat['layers'] += 1
+            stat['seconds'] += layer_seconds(layer)
+            stat['decompress'] += layer['decompress']
+            stat['bytes_in'] += layer['bytes_in']
+            stat['bytes_out'] += layer['bytes_out']
+        return {
+            'layers': len(layers),
+            'wall': time.perf_counter() - self.start,
+            'phases': {phase: sum(layer[phase] for layer in self.layers) for phase in PROFILE_PHASES},
+            'bytes_in': sum(layer['bytes_in'] for layer in layers),
+            'bytes_out': sum(layer['bytes_out'] for layer in layers),
+            'formats': dict(sorted(formats.items(), key=lambda item: -item[1]['seconds'])),
+            'slowest': sorted(layers, key=layer_seconds, reverse=True)[:top],
+        }
+
+    def write_json(self, path, top=10):
+        """把汇总和每层的记录写成 JSON (- 表示标准输出)"""
+        report = {'summary': self.summary(top), 'layers': self.layers}
+        if path == '-':
+            json.dump(report, sys.stdout, ensure_ascii=False, indent=2)
+            print()
+        else:
+            with open(path, 'w', encoding='utf-8') as f:
+                json.dump(report, f, ensure_ascii=False, indent=2)
+            print(f"[+] 性能统计已写入 {path}")
+
+    def print_table(self, top=10):
+        summary = self.summary(top)
+        wall = summary['wall'] or 1e-9
+        print()
+        print(f"[*] 性能统计: {summary['layers']} 层, 总耗时 {summary['wall']:.3f}s, "
+              f"读入 {summary['bytes_in']} 字节, 解出 {summary['bytes_out']} 字节")
+        print(f"{'阶段':<12}{'耗时(s)':>8}{'占比':>7}")
+        for phase, seconds in summary['phases'].items():
+            print(f"{phase:<14}{seconds:>10.3f}{seconds / wall:>9.1%}")
+        print()
+        print(f"{'格式':<10}{'层数':>4}{'耗时(s)':>9}{'输入':>14}{'输出':>14}{'解压 MB/s':>11}")
+        for kind, stat in summary['formats'].items():
+            rate = stat['bytes_out'] / stat['decompress'] / (1 << 20) if stat['decompress'] else 0
+            print(f"{kind:<12}{stat['layers']:>6}{stat['seconds']:>11.3f}{stat['bytes_in']:>16}"
+                  f"{stat['bytes_out']:>16}{rate:>13.1f}")
+        if summary['slowest']:
+            print()
+            print(f"[*] 最慢的 {len(summary['slowest'])} 层:")
+            print(f"{'层':>6}  {'格式':<10}{'耗时(s)':>8}" + ''.join(f"{phase:>12}" for phase in PROFILE_PHASES)
+                  + "  名称")
+            for layer in summary['slowest']:
+                print(f"{layer['depth']:>7}  {layer['type']:<12}{layer_seconds(layer):>10.4f}"
+                      + ''.join(f"{layer[phase]:>12.4f}" for phase in PROFILE_PHASES) + f"  {layer['name']}")
+
+def timer(profile, phase):
+    """profile 为 None 时不计时"""
+    return profile.phase(phase) if profile is not None else nullcontext()
+
+def layer_seconds(layer):
+    """一层各阶段耗时之和"""
+    return sum(layer[phase] for phase in PROFILE_PHASES)
+
+def tree_size(path):
+    """文件的大小, 目录则为其中所有文件的大小之和"""
+    if not os.path.isdir(path):
+        return os.path.getsize(path)
+    return sum(os.path.getsize(os.path.join(root, name)) for root, _, files in os.walk(path) for name in files)
+
+class LayerCache:
+    """按内容寻址的层缓存: 摘要 (BLAKE2) -> {'type': 类型, 'children': [子文件摘要], 'names': [子文件名], 'password': 密码}
+
+    索引保存在 cache_dir/index.json, 链尾的最终文件复制到 cache_dir/objects/<摘要>;
+    重跑时沿索引走到最终文件即可直接回放, 不用再解压; 写入用临时文件 + 原子替换
+    """
+
+    def __init__(self, cache_dir):
+        self.dir = cache_dir
+        self.path = os.path.join(cache_dir, 'index.json')
+        self.index = {}
+        os.makedirs(os.path.join(cache_dir, 'objects'), exist_ok=True)
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                self.index = json.load(f)
+        except FileNotFoundError:
+            pass
+        except (OSError, ValueError) as e:
+            print(f"[!] 缓存索引损坏, 重新建立: {e}")
+
+    def object_path(self, digest):
+        return os.path.join(self.dir, 'objects', digest)
+
+    def add(self, digest, archive_type, children=(), names=(), password=None):
+        """记录一层的类型、解出的子文件和密码 (bytes)"""
+        self.index[digest] = {'type': archive_type, 'children': list(children), 'names': list(names),
+                              'password': None if password is None else password.decode('latin-1')}
+
+    def password(self, digest):
+        """之前破解出的这一层的密码, 没有返回 None"""
+        entry = self.index.get(digest)
+        if entry is None or entry.get('password') is None:
+            return None
+        return entry['password'].encode('latin-1')
 
-    while depth < max_depth:
-        if not os.path.isfile(current_file):
-            print(f"[!] 解压完成: 最终文件是目录或不存在")
-            break
+    def add_leaf(self, digest, path):
+        """记录链尾的最终文件, 并把内容保存到 objects 目录"""
+        self.add(digest, None)
+        if not os.path.exists(self.object_path(digest)):
+            shutil.copyfile(path, self.object_path(digest))
 
-        archive_type = detect_archive_type(current_file)
+    def follow(self, digest):
+        """沿缓存的链往下走, 返回 (层数, 终点文件名, 终点摘要, 结果)
 
-        if not archive_type:
-            print(f"[+] 解压完成: {current_file}")
-            print(f"[+] 总共解压了 {depth} 层")
-            break
+        结果为 'leaf' (走到了保存过的最终文件)、'cycle' (终点摘要在链上出现过) 或 None (链不完整)
+        """
+        seen = set()
+        layers = 0
+        name = None
+        while digest not in seen:
+            seen.add(digest)
+            entry = self.index.get(digest)
+            if entry is None:
+                return layers, name, digest, None
+            if entry['type'] is None:
+                return layers, name, digest, 'leaf' if os.path.isfile(self.object_path(digest)) else None
+            if not entry['children']:
+                return layers, name, digest, None
+            name = entry['names'][0]
+            digest = entry['children'][0]
+            layers += 1
+        return layers, name, digest, 'cycle'
+
+    def save(self):
+        tmp_path = f"{self.path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.index, f)
+        os.replace(tmp_path, self.path)
+
+def recursive_extract_memory(archive_path, max_depth=1000, verbose=False, spill_size=256 << 20, output_dir=None,
+                             crack=None, guard=None, cache=None, profile=None):
+    """在内存中递归解压: 每一层直接从上一层的字节解出, 只有最终文件写入磁盘
+
+    某一层超过 spill_size 字节或无法在内存中处理时, 把它写到磁盘, 后续层交给 recursive_extract;
+    crack 不为 None 时加密层会先进入密码阶段 (见 find_password); guard 为资源限制 (见 ResourceGuard);
+    cache 为 LayerCache 时和磁盘模式一样记录每一层 (摘要、类型、子层摘要、密码), 并直接回放之前解完的链;
+    每层按 BLAKE2 摘要检测循环; profile 为 LayerProfile 时记录每层各阶段的耗时
+    """
+    archive_path = os.path.abspath(archive_path)
+    output_dir = output_dir or os.path.dirname(archive_path)
+    name = os.path.basename(archive_path)
+    with open(archive_path, 'rb') as f:
+        data = f.read()
+    depth = 0
+    hints = []
+    chain = {}
 
-        next_file = extract_archive(current_file, verbose=verbose)
+    def spill():
+        # 当前层写到磁盘, 后续交给 recursive_extract (这一层由它重新记录)
+        if profile is not None:
+            profile.layers.pop()
+        recursive_extract(write_layer(output_dir, name, data), max_depth, verbose, depth, crack, hints, guard,
+                          cache, profile)
 
-        if next_file is None:
-            print(f"[!] 解压停止在第 {depth} 层")
-            break
+    print(f"[*] 开始解压 (内存模式): {name}")
 
-        # 删除已解压的压缩包（可选）
-        # os.remove(current_file)
+    parent = None  # (上一层摘要, 类型, 密码), 算出这一层的摘要后写入缓存
+    known = False
+    try:
+        while depth < max_depth:
+            if profile is not None:
+                profile.begin(depth, name, len(data))
+            with timer(profile, 'hash'):
+                digest = hashlib.blake2b(data).hexdigest()
+            if cache is not None and parent is not None:
+                cache.add(parent[0], parent[1], [digest], [name], parent[2])
+            if digest in chain:
+                print(f"[!] 检测到循环: 第 {depth} 层与第 {chain[digest]} 层内容相同, 停止解压")
+                return
+            chain[digest] = depth
+
+            # 与 recursive_extract 相同: 刚进入缓存里已有的链时尝试回放
+            was_known, known = known, cache is not None and digest in cache.index
+            if known and not was_known:
+                layers, final_name, final_digest, result = cache.follow(digest)
+                if result == 'cycle' and depth + layers < max_depth:
+                    print(f"[!] 检测到循环 (缓存): 第 {depth + layers} 层与之前某一层内容相同, 停止解压")
+                    return
+                if result == 'leaf' and depth + layers < max_depth:
+                    if layers:
+                        with open(cache.object_path(final_digest), 'rb') as f:
+                            name, data = final_name, f.read()
+                    path = write_layer(output_dir, name, data)
+                    print(f"[+] 缓存命中: 跳过 {layers} 层")
+                    print(f"[+] 解压完成: {path}")
+                    print(f"[+] 总共解压了 {depth + layers} 层")
+                    return
+
+            with timer(profile, 'detect'):
+                archive_type = sniff_archive_type(data[:sniff_size(data)]) or guess_by_extension(name)
+
+            if not archive_type:
+                with timer(profile, 'filesystem'):
+                    path = write_layer(output_dir, name, data)
+                if cache is not None:
+                    cache.add_leaf(digest, path)
+                print(f"[+] 解压完成: {path}")
+                print(f"[+] 总共解压了 {depth} 层")
+                return
+
+            if len(data) > spill_size:
+                if verbose:
+                    print(f"[*] {name} 超过内存阈值 ({len(data)} 字节), 改为磁盘解压")
+                spill()
+                return
+
+            hints = archive_hints(data, archive_type, name) + hints
+            password = cache.password(digest) if cache is not None else None
+            if password is not None:
+                if verbose:
+                    print(f"[*] 使用缓存的密码: {password.decode('latin-1')}")
+            elif archive_type != 'zip' and crack is not None and is_encrypted(data, archive_type):
+                # 7z/rar 的密码需要对文件逐个尝试, 交给磁盘模式
+                print(f"[*] {name} 已加密, 改为磁盘解压")
+                spill()
+                return
+            else:
+                with timer(profile, 'password'):
+                    encrypted, password = unlock(data, archive_type, name, hints, crack, verbose)
+                if encrypted and password is None:
+                    print(f"[!] 解压停止在第 {depth} 层")
+                    return
+
+            if verbose:
+                print(f"[*] 解压 {name} ({archive_type})")
+            if profile is not None:
+                profile.set(type=archive_type)
+            try:
+                with timer(profile, 'decompress'):
+                    members = unpack_bytes(data, archive_type, password, guard)
+            except LimitExceeded as e:
+                print(f"[!] 触发资源限制: {e}")
+                print(f"[!] 解压停止在第 {depth} 层")
+                return
+            except NotImplementedError as e:
+                if verbose:
+                    print(f"[*] {e}, 改为磁盘解压")
+                spill()
+                return
+            except Exception as e:
+                print(f"[!] 解压失败: {e}")
+                print(f"[!] 解压停止在第 {depth} 层")
+                return
+
+            if not members:
+                print("[!] 警告: 没有解压出任何文件")
+                print(f"[!] 解压停止在第 {depth} 层")
+                return
+            if profile is not None:
+                profile.set(bytes_out=sum(len(member_data) for _, member_data in members))
+
+            if verbose:
+                print(f"[+] 解压成功: {', '.join(member or '(数据流)' for member, _ in members)}")
+
+            # 单文件压缩流没有成员名, 沿用去掉扩展名的文件名
+            parent = (digest, archive_type, password)
+            member, data = members[0]
+            name = member or decompressed_name(name, archive_type)
+            depth += 1
+
+            if verbose:
+                print(f"[*] 当前深度: {depth}")
+    finally:
+        if cache is not None:
+            cache.save()
+
+    print(f"[!] 达到最大深度 {max_depth}，停止解压")
+
+def recursive_extract(archive_path, max_depth=1000, verbose=False, depth=0, crack=None, hints=None, guard=None,
+                      cache=None, profile=None):
+    """递归解压嵌套压缩包 (depth 为已经解压的层数, 内存模式转入磁盘时接着计数)
+
+    crack 不为 None 时加密层会先进入密码阶段; hints 为之前各层收集到的密码提示; guard 为资源限制;
+    cache 为 LayerCache 时记录每一层, 并直接回放之前解完的链. 每层按 BLAKE2 摘要检测循环;
+    profile 为 LayerProfile 时记录每层识别/摘要/密码/解压/文件系统各阶段的耗时和字节数
+    """
+    current_file = os.path.abspath(archive_path)
+    hints = list(hints or [])
+    chain = {}  # 本次解压经过的摘要 -> 层数
+    parent = None  # (上一层摘要, 类型, 密码), 算出这一层的摘要后写入缓存
+    known = False
 
-        current_file = next_file
-        depth += 1
+    print(f"[*] 开始解压: {os.path.basename(current_file)}")
 
-        if verbose:
-            print(f"[*] 当前深度: {depth}")
+    try:
+        while depth < max_depth:
+            if not os.path.isfile(current_file):
+                print(f"[!] 解压完成: 最终文件是目录或不存在")
+                break
+
+            name = os.path.basename(current_file)
+            if profile is not None:
+                profile.begin(depth, name, os.path.getsize(current_file))
+            with timer(profile, 'hash'):
+                digest = file_digest(current_file, 'blake2b')
+            if cache is not None and parent is not None:
+                cache.add(parent[0], parent[1], [digest], [name], parent[2])
+
+            if digest in chain:
+                print(f"[!] 检测到循环: 第 {depth} 层与第 {chain[digest]} 层内容相同, 停止解压")
+                break
+            chain[digest] = depth
+
+            # 刚进入缓存里已有的链 (第一层, 或从未知内容接上已知的链) 时尝试回放
+            was_known, known = known, cache is not None and digest in cache.index
+            if known and not was_known:
+                layers, final_name, final_digest, result = cache.follow(digest)
+                if result == 'cycle' and depth + layers < max_depth:
+                    print(f"[!] 检测到循环 (缓存): 第 {depth + layers} 层与之前某一层内容相同, 停止解压")
+                    break
+                if result == 'leaf' and depth + layers < max_depth:
+                    if layers:
+                        current_file = os.path.join(os.path.dirname(current_file), final_name)
+                        shutil.copyfile(cache.object_path(final_digest), current_file)
+                    depth += layers
+                    print(f"[+] 缓存命中: 跳过 {layers} 层")
+                    print(f"[+] 解压完成: {current_file}")
+                    print(f"[+] 总共解压了 {depth} 层")
+                    break
+
+            with timer(profile, 'detect'):
+                archive_type = detect_archive_type(current_file)
+
+            if not archive_type:
+                if cache is not None:
+                    cache.add_leaf(digest, current_file)
+                print(f"[+] 解压完成: {current_file}")
+                print(f"[+] 总共解压了 {depth} 层")
+                break
+
+            hints = archive_hints(current_file, archive_type, name) + hints
+            password = cache.password(digest) if cache is not None else None
+            if password is None:
+                with timer(profile, 'password'):
+                    encrypted, password = unlock(current_file, archive_type, name, hints, crack, verbose)
+                if encrypted and password is None:
+                    print(f"[!] 解压停止在第 {depth} 层")
+                    break
+            elif verbose:
+                print(f"[*] 使用缓存的密码: {password.decode('latin-1')}")
+
+            if profile is not None:
+                profile.set(type=archive_type)
+            try:
+                next_file = extract_archive(current_file, verbose=verbose, archive_type=archive_type,
+                                            password=password, guard=guard, profile=profile)
+            except LimitExceeded as e:
+                print(f"[!] 触发资源限制: {e}")
+                print(f"[!] 解压停止在第 {depth} 层")
+                break
+
+            if next_file is None:
+                print(f"[!] 解压停止在第 {depth} 层")
+                break
+
+            # 删除已解压的压缩包（可选）
+            # os.remove(current_file)
+
+            parent = (digest, archive_type, password)
+            current_file = next_file
+            depth += 1
+
+            if verbose:
+                print(f"[*] 当前深度: {depth}")
+    finally:
+        if cache is not None:
+            cache.save()
 
     if depth >= max_depth:
         print(f"[!] 达到最大深度 {max_depth}，停止解压")
 
+def file_digest(path, algorithm='sha256'):
+    """分块计算文件的摘要, 用于识别内容相同的成员 (树形模式用 SHA-256, 层缓存用 BLAKE2)"""
+    h = hashlib.new(algorithm)
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(COPY_CHUNK), b''):
+            h.update(chunk)
+    return h.hexdigest()
+
+def extract_node(path, out_dir, archive_type, crack=None, guard=None):
+    """解压树中的一个节点到独立目录 (可在子进程中运行), 返回 [(子文件, 摘要, 类型)], 失败返回 None
+
+    节点本身已经在进程池中运行, 所以密码阶段只用单进程; guard 使用副本检查单层限制,
+    累计字节数由调用方根据返回的文件汇总 (子进程里的修改本来也传不回去)
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    guard = copy.copy(guard)
+    name = os.path.basename(path)
+    if crack is not None:
+        crack = dict(crack, workers=1)
+    encrypted, password = unlock(path, archive_type, name, archive_hints(path, archive_type, name), crack)
+    if encrypted and password is None:
+        return None
+    if extract_archive(path, out_dir, archive_type=archive_type, password=password, guard=guard) is None:
+        return None
+    children = []
+    for root, dirs, files in os.walk(out_dir):
+        dirs.sort()
+        for name in sorted(files):
+            child = os.path.join(root, name)
+            children.append((child, file_digest(child), detect_archive_type(child)))
+    return children
+
+def print_tree(nodes, root):
+    """按层级打印解压树; 缩进最多 20 级, 层数写在方括号里 (用栈遍历, 上千层也不会递归过深)"""
+    base = os.path.dirname(root)
+    stack = [root]
+    while stack:
+        path = stack.pop()
+        node = nodes[path]
+        label = os.path.basename(path)
+        if node['type']:
+            label += f" ({node['type']})"
+        if node['dup_of']:
+            label += f"  [与 {os.path.relpath(node['dup_of'], base)} 内容相同, 跳过]"
+        elif node['error']:
+            label += f"  [{node['error']}]"
+        print(f"{'  ' * min(node['depth'], 20)}[{node['depth']}] {label}")
+        stack.extend(reversed(node['children']))
+
+def extract_tree(archive_path, max_depth=1000, verbose=False, workers=0, output_dir=None, crack=None, guard=None):
+    """树形解压: 每个压缩包的所有成员都会继续解压, 兄弟压缩包由进程池并行处理
+
+    所有节点平铺解压到 "<文件名>_extracted/<节点编号>" 目录, 路径长度不随层数增长;
+    内容相同 (SHA-256) 的成员只解压一次; 单个节点超出资源限制时只跳过该节点,
+    累计字节数或总耗时超限时停止整棵树. 返回节点表
+    """
+    archive_path = os.path.abspath(archive_path)
+    workers = workers or os.cpu_count() or 1
+    root_type = detect_archive_type(archive_path)
+    nodes = {archive_path: {'id': 0, 'type': root_type, 'depth': 0, 'children': [], 'dup_of': None, 'error': None}}
+    seen = {file_digest(archive_path): archive_path}
+
+    print(f"[*] 开始树形解压: {os.path.basename(archive_path)} (进程数: {workers})")
+
+    tree_dir = os.path.join(output_dir or os.path.dirname(archive_path),
+                            os.path.basename(archive_path) + '_extracted')
+    if os.path.isdir(tree_dir):
+        shutil.rmtree(tree_dir)
+
+    def out_dir_for(path):
+        return os.path.join(tree_dir, str(nodes[path]['id']))
+
+    def add_children(path, children):
+        node = nodes[path]
+        if isinstance(children, LimitExceeded):
+            node['error'] = f"资源限制: {children}"
+            return []
+        if children is None:
+            node['error'] = '解压失败'
+            return []
+        if guard is not None:
+            guard.account(sum(os.path.getsize(child) for child, _, _ in children))
+        todo = []
+        for child, digest, child_type in children:
+            dup_of = seen.setdefault(digest, child)
+            nodes[child] = {'id': len(nodes), 'type': child_type, 'depth': node['depth'] + 1, 'children': [],
+                            'dup_of': None if dup_of == child else dup_of, 'error': None}
+            node['children'].append(child)
+            if child_type and dup_of == child:
+                if node['depth'] + 1 >= max_depth:
+                    nodes[child]['error'] = '达到最大深度'
+                else:
+                    todo.append(child)
+        if verbose:
+            print(f"[+] {os.path.basename(path)}: {len(children)} 个成员, {len(todo)} 个待解压")
+        return todo
+
+    todo = [archive_path] if root_type else []
+    try:
+        if workers == 1:
+            while todo:
+                path = todo.pop()
+                try:
+                    children = extract_node(path, out_dir_for(path), nodes[path]['type'], crack, guard)
+                except LimitExceeded as e:
+                    children = e
+                todo.extend(add_children(path, children))
+        else:
+            pool = ProcessPoolExecutor(max_workers=workers)
+            try:
+                pending = {}
+                while todo or pending:
+                    for path in todo:
+                        future = pool.submit(extract_node, path, out_dir_for(path), nodes[path]['type'], crack, guard)
+                        pending[future] = path
+                    todo = []
+                    done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        path = pending.pop(future)
+                        try:
+                            children = future.result()
+                        except LimitExceeded as e:
+                            children = e
+                        except Exception as e:
+                            print(f"[!] 解压失败: {os.path.basename(path)}: {e}")
+                            children = None
+                        todo.extend(add_children(path, children))
+            finally:
+                pool.shutdown(cancel_futures=True)
+    except LimitExceeded as e:
+        print(f"[!] 触发资源限制: {e}, 停止解压")
+
+    print()
+    print_tree(nodes, archive_path)
+
+    leaves = sorted(path for path, node in nodes.items()
+                    if not node['type'] and not node['dup_of'] and path != archive_path)
+    archives = sum(1 for node in nodes.values() if node['type'] and node['children'])
+    duplicates = sum(1 for node in nodes.values() if node['dup_of'])
+    print()
+    print(f"[+] 共 {len(nodes)} 个节点: 解压 {archives} 个压缩包, 跳过 {duplicates} 个重复成员, "
+          f"最大深度 {max(node['depth'] for node in nodes.values())}")
+    for path in leaves:
+        print(f"[+] 最终文件: {path}")
+    return nodes
+
 def main():
     parser = argparse.ArgumentParser(
         description='压缩包套娃解压工具 - 自动递归解压嵌套压缩包',
         formatter_class=argparse.RawDescriptionHelpFormatter,
         epilog="""
 支持的格式:
-  zip, rar, 7z, tar.gz, tar.bz2, tar.xz, gz, bz2, xz
+  zip, rar, 7z, tar, tar.gz, tar.bz2, tar.xz, tar.lzma, tar.zst, gz, bz2, xz, lzma, zst
 
 示例:
   %(prog)s flag.zip
   %(prog)s nested.tar.gz --max-depth 100
   %(prog)s archive.7z -v
+  %(prog)s deep.zip --memory --spill-size 64
+  %(prog)s fanout.zip --tree -w 8
+  %(prog)s locked.zip --wordlist rockyou.txt --digits 6
+  %(prog)s suspicious.zip --max-layer-size 100 --max-ratio 200 --timeout 60
+  %(prog)s challenge.zip --cache ~/.cache/taowa
+  %(prog)s deep.zip --profile --profile-json profile.json
         """
     )
 
     parser.add_argument('archive', help='要解压的压缩包')
     parser.add_argument('--max-depth', type=int, default=1000,
                        help='最大递归深度 (默认: 1000)')
+    parser.add_argument('--memory', action='store_true',
+                       help='在内存中逐层解压, 只把最终文件写入磁盘')
+    parser.add_argument('--spill-size', type=int, default=256,
+                       help='内存模式下单层超过该大小 (MB) 时改用磁盘解压 (默认: 256)')
+    parser.add_argument('--tree', action='store_true',
+                       help='树形解压: 解压每一层的所有成员, 并行处理兄弟压缩包并打印完整的解压树')
+    parser.add_argument('-w', '--workers', type=int, default=0,
+                       help='树形解压和密码破解的并行进程数 (默认: 0=CPU 核数)')
+    parser.add_argument('--wordlist', metavar='FILE',
+                       help='加密层的密码字典 (每行一个)')
+    parser.add_argument('--digits', type=int, default=None,
+                       help='加密层尝试 1 到 N 位的纯数字密码 (默认: zip 6 位, 7z/rar 需要逐个完整解密, 只试 4 位; 0=不尝试)')
+    parser.add_argument('--no-crack', action='store_true',
+                       help='遇到加密层时不尝试破解密码')
+    parser.add_argument('--max-layer-size', type=int, default=1024,
+                       help='单层最多解压出的数据量 (MB, 默认: 1024, 0=不限制)')
+    parser.add_argument('--max-total-size', type=int, default=4096,
+                       help='累计最多解压出的数据量 (MB, 默认: 4096, 0=不限制)')
+    parser.add_argument('--max-ratio', type=int, default=1000,
+                       help='单层最大压缩比, 只对超过 1MB 的输出检查 (默认: 1000, 0=不限制)')
+    parser.add_argument('--max-members', type=int, default=10000,
+                       help='单层最多成员数 (默认: 10000, 0=不限制)')
+    parser.add_argument('--timeout', type=float, default=0,
+                       help='总耗时上限 (秒, 默认: 0=不限制)')
+    parser.add_argument('--cache', metavar='DIR',
+                       help='层缓存目录: 记录每一层的摘要、类型和密码, 重跑时直接回放已经解完的链')
+    parser.add_argument('--profile', action='store_true',
+                       help='解压结束后打印逐层性能统计: 各阶段耗时、格式直方图和最慢的层 (不支持 --tree)')
+    parser.add_argument('--profile-json', metavar='FILE',
+                       help='把逐层性能统计写入 JSON 文件 (- 表示标准输出)')
+    parser.add_argument('--profile-top', type=int, default=10,
+                       help='性能统计中列出的最慢层数 (默认: 10)')
     parser.add_argument('-v', '--verbose', action='store_true',
                        help='显示详细信息')
 
     args = parser.parse_args()
+    if args.tree and (args.profile or args.profile_json):
+        # extract_tree 的各节点在子进程里解压, 没有逐层统计
+        parser.error('--profile/--profile-json 不支持 --tree 树形模式')
 
     if not os.path.isfile(args.archive):
         print(f"[!] 错误: 文件不存在 '{args.archive}'", file=sys.stderr)
         sys.exit(1)
 
-    recursive_extract(args.archive, max_depth=args.max_depth, verbose=args.verbose)
+    crack = None
+    if not args.no_crack:
+        if args.wordlist and not os.path.isfile(args.wordlist):
+            print(f"[!] 错误: 字典不存在 '{args.wordlist}'", file=sys.stderr)
+            sys.exit(1)
+        crack = {'wordlist': args.wordlist, 'digits': args.digits, 'workers': args.workers}
+
+    guard = ResourceGuard(args.max_layer_size << 20, args.max_total_size << 20, args.max_ratio,
+                          args.max_members, args.timeout)
+
+    cache = LayerCache(args.cache) if args.cache else None
+    profile = LayerProfile() if args.profile or args.profile_json else None
+
+    if args.tree:
+        extract_tree(args.archive, max_depth=args.max_depth, verbose=args.verbose, workers=args.workers,
+                     crack=crack, guard=guard)
+    elif args.memory:
+        recursive_extract_memory(args.archive, max_depth=args.max_depth, verbose=args.verbose,
+                                 spill_size=args.spill_size << 20, crack=crack, guard=guard, cache=cache,
+                                 profile=profile)
+    else:
+        recursive_extract(args.archive, max_depth=args.max_depth, verbose=args.verbose, crack=crack, guard=guard,
+                          cache=cache, profile=profile)
+
+    if profile is not None:
+        if args.profile:
+            profile.print_table(args.profile_top)
+        if args.profile_json:
+            profile.write_json(args.profile_json, args.profile_top)
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
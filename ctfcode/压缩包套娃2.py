@@ -1,57 +1,23 @@
 import os
-import subprocess
-import py7zr
+
+from archive_backends import BACKENDS, detect_archive_type, extract_to
 
 input_file = 'shell9999.tar.gz'  # 更改为你的文件路径
 
 def get_compressed_type(filepath: str) -> str:
-    cmd = ['file', filepath]
-    file_cmd_output = subprocess.run(cmd, stdout=subprocess.PIPE).stdout.decode().strip()
-
-    if 'gzip compressed data' in file_cmd_output:
-        return 'tar.gz'
-    if 'Zip archive data' in file_cmd_output:
-        return 'zip'
-    if '7-zip archive data' in file_cmd_output:
-        return '7z'
-    if 'gzip compressed data' in file_cmd_output:
-        return 'gzip'
-    if 'XZ compressed data' in file_cmd_output:
-        return 'xz'
-    if 'bzip2 compressed data' in file_cmd_output:
-        return 'bzip2'
-    if 'LZMA compressed data' in file_cmd_output:
-        return 'lzma'
-    if 'Zstandard compressed data' in file_cmd_output:
-        return 'zstd'
-    return ''
+    # 与 压缩包套娃.py 共用 archive_backends 的魔数检测, 不再调用 file 命令
+    return detect_archive_type(filepath) or ''
 
 while True:
     ctype = get_compressed_type(input_file)
-    if ctype == "tar.gz":
-        cmd = ['tar', '-xzf', input_file]
-        subprocess.run(cmd)
-    elif ctype == "zip":
-        cmd = ['unzip', input_file]
-        subprocess.run(cmd)
-    elif ctype == "7z":
-        with py7zr.SevenZipFile(input_file, mode='r') as z:
-            z.extractall()
-    elif ctype == "gzip":
-        tmp_file = input_file + ".gz"
-        cmd = "mv {} {}; gunzip {}".format(input_file, tmp_file, tmp_file)
-    elif ctype == "xz":
-        tmp_file = input_file + ".xz"
-        cmd = "mv {} {}; unxz {}".format(input_file, tmp_file, tmp_file)
-    elif ctype == "bzip2":
-        tmp_file = input_file + ".bz2"
-        cmd = "mv {} {}; bunzip2 {}".format(input_file, tmp_file, tmp_file)
-    elif ctype == "lzma":
-        tmp_file = input_file + ".lzma"
-        cmd = "mv {} {}; unlzma {}".format(input_file, tmp_file, tmp_file)
-    elif ctype == "zstd":
-        tmp_file = input_file + ".zst"
-        cmd = "mv {} {}; unzstd --force {}".format(input_file, tmp_file, tmp_file)
+    if ctype in BACKENDS:
+        # zip/7z/rar/tar.* 以及 gz/xz/bz2/lzma/zst 都在进程内流式解压到当前目录
+        try:
+            extract_to(input_file, '.', ctype)
+        except RuntimeError as e:
+            # 缺少可选模块 (如 zst 需要 zstandard)
+            print(f"Cannot extract {input_file}: {e}")
+            break
     else:
         print("Unsupported file type or done extracting!")
         break
@@ -63,4 +29,4 @@ while True:
         input_file = files[0]
     else:
         print("Unexpected number of files in directory!")
-        break
\ No newline at end of file
+        break